@@ -0,0 +1,167 @@
+"""Caches that save FieldClimateClient from refetching unchanged responses."""
+
+__all__ = ["RevalidatingCache", "ExpiringCache"]
+
+import json
+from collections import OrderedDict
+from hashlib import blake2b
+from time import monotonic
+from weakref import WeakValueDictionary
+
+import anyio
+
+MISSING = object()
+
+
+def digest(content: bytes) -> bytes:
+    # Hashing a body is much cheaper than decoding its JSON.
+    return blake2b(content, digest_size=16).digest()
+
+
+def request_key(method, path, data=None):
+    # Equal request bodies should share a key, however their dicts were ordered.
+    if data is not None and not isinstance(data, (str, bytes)):
+        data = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return method, path, data
+
+
+class CacheEntry:
+    __slots__ = ("etag", "last_modified", "digest", "data")
+
+    def __init__(self, etag, last_modified, digest, data):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.data = data
+
+    def validators(self):
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class RevalidatingCache:
+    """Remember decoded responses by path, with their validators.
+
+    Requests for a cached path are sent with If-None-Match and
+    If-Modified-Since headers, when the server gave an ETag or a
+    Last-Modified date. A 304 Not Modified response reuses the cached
+    data. Otherwise, a body identical to the cached one (by hash) is not
+    decoded again. Holds up to max_entries paths, dropping the least
+    recently used.
+
+    Cached data is shared between callers, so don't modify it."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, path):
+        entry = self.entries.get(path)
+        if entry is not None:
+            self.entries.move_to_end(path)
+        return entry
+
+    def headers(self, path):
+        entry = self.get(path)
+        return entry.validators() if entry is not None else {}
+
+    def put(self, path, entry):
+        self.entries[path] = entry
+        self.entries.move_to_end(path)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def update(self, path, response, sent=None):
+        """Return (data, changed) for a response to a request for path.
+
+        sent is the entry whose validators went with the request. It
+        answers a 304 even if it was dropped while the request was out."""
+        entry = self.get(path)
+        if entry is None:
+            entry = sent
+        if entry is not None and response.status_code == 304:
+            self.hits += 1
+            self.put(path, entry)
+            return entry.data, False
+        if not 200 <= response.status_code < 300:
+            # Errors aren't new data, so pass them on and keep the cached entry.
+            return response.json(), False
+        content_digest = digest(response.content)
+        if entry is not None and entry.digest == content_digest:
+            self.hits += 1
+            data, changed = entry.data, False
+        else:
+            self.misses += 1
+            data, changed = response.json(), True
+        headers = response.headers
+        self.put(
+            path,
+            CacheEntry(
+                headers.get("ETag"), headers.get("Last-Modified"), content_digest, data
+            ),
+        )
+        return data, changed
+
+    def clear(self):
+        self.entries.clear()
+
+
+class ExpiringCache:
+    """Remember data by key for a number of seconds, or forever.
+
+    Holds up to max_entries keys, dropping the least recently used.
+    Tasks about to fetch the same key can share lock(key), so only the
+    first fetches it and the rest find it cached.
+
+    Cached data is shared between callers, so don't modify it."""
+
+    def __init__(self, max_entries=256, clock=monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        # key -> (expiry time or None, data)
+        self.entries = OrderedDict()
+        self.locks = WeakValueDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires, data = entry
+            if expires is None or expires > self.clock():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return data
+            del self.entries[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, data, ttl=None):
+        """Remember data for ttl seconds, or forever if ttl is None."""
+        expires = None if ttl is None else self.clock() + ttl
+        self.entries[key] = (expires, data)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def lock(self, key):
+        # Locks are forgotten once no task holds or waits for them.
+        lock = self.locks.get(key)
+        if lock is None:
+            lock = self.locks[key] = anyio.Lock()
+        return lock
+
+    def clear(self):
+        self.entries.clear()
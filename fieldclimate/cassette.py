@@ -0,0 +1,172 @@
+"""Record requests and responses to a cassette file, and replay them offline.
+
+Record real traffic once:
+
+    client = FieldClimateClient()
+    client.record("pipeline.cassette")
+    async with client:
+        ...  # saved when the client closes
+
+Then replay it as fast as you like, with no network or HMAC keys needed:
+
+    transport = ReplayTransport("pipeline.cassette", latency=0.05)
+    async with FieldClimateClient("x", "x", transport=transport) as client:
+        ...
+
+A cassette is one file: a header, the response bodies (each distinct body
+stored once), a JSON index, and the index's offset as 8 bytes. Replays
+read bodies straight out of a memory map of the file. Authorization
+headers are redacted before anything is written."""
+
+__all__ = ["RecordingTransport", "ReplayTransport"]
+
+import json
+import mmap
+import struct
+from hashlib import blake2b
+from urllib.parse import urlparse
+
+import anyio
+from asks.req_structs import CaseInsensitiveDict
+
+from fieldclimate.transport import Response
+
+MAGIC = b"FIELDCLIMATE CASSETTE 1\n"
+FOOTER = struct.Struct("<Q")
+REDACTED = "REDACTED"
+
+
+def digest(content: bytes) -> str:
+    return blake2b(content, digest_size=16).hexdigest()
+
+
+def request_key(method, url, data=None):
+    # Requests match on method, path and body, but not headers like Date.
+    parsed = urlparse(url)
+    key = f"{method} {parsed.path}"
+    if parsed.query:
+        key += f"?{parsed.query}"
+    if data:
+        if not isinstance(data, (str, bytes)):
+            data = json.dumps(data, sort_keys=True)
+        if isinstance(data, str):
+            data = data.encode()
+        key += f" {digest(data)}"
+    return key
+
+
+def redact(headers):
+    return {
+        name: REDACTED if name.lower() == "authorization" else value
+        for name, value in (headers or {}).items()
+    }
+
+
+class RecordingTransport:
+    """Pass requests on to another transport, recording them to a cassette.
+
+    Each new body is written to the cassette as it arrives, so only the
+    index is kept in memory. The index is written when the transport is
+    closed, or by save()."""
+
+    def __init__(self, transport, path):
+        self.transport = transport
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        # {digest: (offset, length)} of each body written so far.
+        self.bodies = {}
+        self.index = []
+
+    @property
+    def max_concurrency(self):
+        return getattr(self.transport, "max_concurrency", None)
+
+    async def request(self, method, url, data=None, headers=None):
+        response = await self.transport.request(method, url, data, headers)
+        body_digest = digest(response.content)
+        if body_digest not in self.bodies:
+            self.bodies[body_digest] = (self.file.tell(), len(response.content))
+            self.file.write(response.content)
+        offset, length = self.bodies[body_digest]
+        self.index.append(
+            {
+                "key": request_key(method, url, data),
+                "request_headers": redact(headers),
+                "status_code": response.status_code,
+                "headers": dict(response.headers),
+                "offset": offset,
+                "length": length,
+                "wire_size": response.wire_size,
+            }
+        )
+        return response
+
+    async def warm_up(self, url, connections):
+        await self.transport.warm_up(url, connections)
+
+    def save(self):
+        # Write the index after the bodies, then step back over it, so
+        # bodies recorded later replace it until the next save.
+        index_offset = self.file.tell()
+        self.file.write(json.dumps(self.index, separators=(",", ":")).encode())
+        self.file.write(FOOTER.pack(index_offset))
+        self.file.truncate()
+        self.file.flush()
+        self.file.seek(index_offset)
+
+    async def close(self):
+        await self.transport.close()
+        self.save()
+        self.file.close()
+
+
+class ReplayTransport:
+    """Answer requests from a cassette, optionally after some latency.
+
+    latency is a number of seconds, or a function returning one for each
+    request. Requests recorded more than once are answered in the order
+    they were recorded, repeating the last answer when they run out.
+    Unrecorded requests raise LookupError."""
+
+    def __init__(self, path, latency=0):
+        self.path = path
+        self.latency = latency
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a FieldClimate cassette")
+        (index_offset,) = FOOTER.unpack(self.map[-FOOTER.size :])
+        self.recordings = {}
+        for entry in json.loads(self.map[index_offset : -FOOTER.size]):
+            self.recordings.setdefault(entry["key"], []).append(entry)
+        self.played = {}
+
+    def __len__(self):
+        return sum(map(len, self.recordings.values()))
+
+    async def request(self, method, url, data=None, headers=None):
+        key = request_key(method, url, data)
+        try:
+            entries = self.recordings[key]
+        except KeyError:
+            raise LookupError(f"No recorded response for {key}") from None
+        played = self.played.get(key, 0)
+        self.played[key] = played + 1
+        entry = entries[min(played, len(entries) - 1)]
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            await anyio.sleep(latency)
+        offset, length = entry["offset"], entry["length"]
+        return Response(
+            entry["status_code"],
+            CaseInsensitiveDict(entry["headers"]),
+            self.map[offset : offset + length],
+            entry["wire_size"],
+        )
+
+    async def warm_up(self, url, connections):
+        pass
+
+    async def close(self):
+        self.map.close()
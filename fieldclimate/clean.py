@@ -8,12 +8,18 @@ from datetime import datetime, timedelta, timezone
 from numbers import Real
 from typing import Union
 
+from fieldclimate import models
+
 
 def time(*times: Union[str, int, datetime]) -> str:
     # Server expects t_from and t_to params as unix timestamps since UTC.
     for time in times:
+        # numpy datetime64s are UTC, and convert without a datetime in between.
+        if getattr(getattr(time, "dtype", None), "kind", None) == "M":
+            time = time.astype("datetime64[s]").astype("int64")
         # I also want to support datetime objects, but timezones make this tricky!
-        if isinstance(time, datetime):
+        # This covers pandas Timestamps too, which subclass datetime.
+        elif isinstance(time, datetime):
             # for naive datetimes, assume and insert UTC.
             if time.utcoffset() is None:
                 time = time.replace(tzinfo=timezone.utc)
@@ -84,8 +90,10 @@ def time_period(time_period: Union[str, Real, timedelta]) -> str:
     return time_period
 
 
-def station(station: Union[str, dict]) -> str:
+def station(station: Union[str, dict, "models.Station"]) -> str:
     # Server expects 'station_id', an 8-digit serial code.
+    if isinstance(station, models.Station):
+        return station.id
     # Dicts returned by get_user_stations() store that code like this:
     # {'name': {'original': 'STATION_ID'}, ...}
     # So lets try and extract that ID in case station is a dict.
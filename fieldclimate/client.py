@@ -0,0 +1,578 @@
+"""FieldClimateClient signs requests and has a method for every API route."""
+
+__all__ = ["FieldClimateClient", "ResponseError"]
+
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from os import getenv
+from time import time
+
+from asks import Session
+
+from fieldclimate import cache, cassette, clean, compression, concurrency, dispatch
+from fieldclimate.transport import AsksTransport
+
+# FieldClimateClient.raise_for_status() sets this for every request in its block.
+raise_errors = ContextVar("fieldclimate_raise_errors", default=False)
+
+
+class ResponseError(Exception):
+    """The server answered with an error. data is the decoded body, if any."""
+
+    def __init__(self, method, path, response, data=None):
+        self.method = method
+        self.path = path
+        self.response = response
+        self.status_code = response.status_code
+        self.data = data
+        super().__init__(f"{method} {path} returned {self.status_code}: {data!r}")
+
+
+class FieldClimateClient(Session):
+    """Adapt asks.Session to FieldClimate's API.
+
+    Requires HMAC public and private keys for authentication.
+
+    Requests are sent through self.transport, which defaults to an
+    AsksTransport wrapping this session. See fieldclimate.transport.
+
+    Requests wait for one of the session's connections in self.dispatcher,
+    by the priority set with priority(). See fieldclimate.dispatch.
+
+    GET requests to paths matching revalidated_paths are remembered in
+    self.cache, and only decoded again when they change. Chart responses
+    are remembered in self.chart_cache, for chart_ttl seconds or forever
+    once their period has closed. See fieldclimate.cache.
+
+    Compressed and decompressed bytes received are counted by endpoint
+    in self.transfer_stats. See fieldclimate.compression.
+
+    If given a quota, requests are counted against its daily limits, and
+    bulk priority requests are paced to fit them. See fieldclimate.quota.
+
+    If limiter is set, every request first awaits limiter.acquire(), such
+    as a SharedTokenBucket from fieldclimate.executor.
+
+    Usage: See README.rst
+    """
+
+    base_location = "https://api.fieldclimate.com/v1"
+    public_key = None
+    private_key = None
+    # Settings for the default AsksTransport:
+    keep_alive = True
+    keepalive_expiry = 5.0
+    # Share of connections that bulk priority requests may use at once:
+    bulk_share = 0.5
+    # GET routes that rarely change, and how many responses to remember:
+    revalidated_paths = [
+        r"/station/[^/]+",
+        r"/station/[^/]+/(sensors|nodes|licenses)",
+        r"/forecast/[^/]+/.+",
+    ]
+    cache_size = 1024
+    # Charts are remembered for chart_ttl seconds, or forever once their period
+    # ended chart_settle seconds ago, as late uploads can't change them then:
+    chart_ttl = 60
+    chart_settle = 86400
+    chart_cache_size = 256
+    # Anything with an async acquire() method, awaited before each request:
+    limiter = None
+
+    def __init__(
+        self, public_key=None, private_key=None, transport=None, quota=None, **kwargs
+    ):
+        # Set hmac keys, preferring init args over env vars over subclass's attributes.
+        self.public_key = public_key or self.find_public_key() or self.public_key
+        self.private_key = private_key or self.find_private_key() or self.private_key
+        # Set base_location so asks can build urls for us.
+        default_session_kwargs = {"base_location": self.base_location}
+        super().__init__(**default_session_kwargs, **kwargs)
+        self.transport = transport or AsksTransport(
+            self, keep_alive=self.keep_alive, keepalive_expiry=self.keepalive_expiry
+        )
+        # Size the dispatcher for the transport, as HTTP/2 carries many requests
+        # per connection. Transports without a limit get one per connection.
+        slots = getattr(self.transport, "max_concurrency", None) or self._connections
+        self.dispatcher = dispatch.Dispatcher(slots, self.bulk_share)
+        self.cache = cache.RevalidatingCache(self.cache_size)
+        self.chart_cache = cache.ExpiringCache(self.chart_cache_size)
+        self.transfer_stats = compression.TransferStats()
+        self.quota = quota
+
+    @classmethod
+    def find_public_key(cls):
+        return getenv("FIELDCLIMATE_PUBLIC_KEY")
+
+    @classmethod
+    def find_private_key(cls):
+        return getenv("FIELDCLIMATE_PRIVATE_KEY")
+
+    def get_headers(self, method, path):
+        # Create HMAC authentication headers as described here:
+        # https://api.fieldclimate.com/v1/docs/#authentication-hmac
+        date = datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
+        if None in [self.public_key, self.private_key]:
+            raise TypeError("HMAC headers require public_ and private_key settings.")
+        # pycryptodome is slow to import, so wait until the first request needs it.
+        from Crypto.Hash import HMAC, SHA256
+
+        message = method + path + date + self.public_key
+        signature = HMAC.new(self.private_key.encode(), message.encode(), SHA256)
+        return {
+            "Accept": "application/json",
+            "Date": date,
+            "Authorization": f"hmac {self.public_key}:{signature.hexdigest()}",
+        }
+
+    def is_revalidated(self, method, path):
+        return method == "GET" and any(
+            re.fullmatch(pattern, path) for pattern in self.revalidated_paths
+        )
+
+    def chart_expiry(self, path):
+        """Seconds to remember a chart path for, None for forever, or 0 if not a chart."""
+        match = re.fullmatch(
+            r"/chart/[^/]+/[^/]+/[^/]+/(last/[^/]+|from/\d+/to/(\d+))", path
+        )
+        if match is None:
+            return 0
+        t_to = match.group(2)
+        if t_to is not None and int(t_to) < time() - self.chart_settle:
+            return None
+        return self.chart_ttl
+
+    async def request_json(self, method, path, data=None):
+        expiry = self.chart_expiry(path)
+        if expiry == 0:
+            return (await self.send(method, path, data))[1]
+        key = cache.request_key(method, path, data)
+        # Identical chart requests wait for the first one, rather than all being sent.
+        async with self.chart_cache.lock(key):
+            result = self.chart_cache.get(key, cache.MISSING)
+            if result is cache.MISSING:
+                response, result = await self.send(method, path, data)
+                if 200 <= response.status_code < 300:
+                    self.chart_cache.set(key, result, expiry)
+        return result
+
+    async def send(self, method, path, data=None):
+        """Send a signed request, returning the response and its decoded JSON."""
+        revalidated = self.is_revalidated(method, path)
+        # Session._make_url() generates the full url using base_location and path.
+        url = self._make_url(path)
+        if self.quota is not None:
+            # Bulk requests wait here, rather than while holding a connection.
+            await self.quota.wait(self.public_key, path)
+        if self.limiter is not None:
+            await self.limiter.acquire()
+        async with self.dispatcher.slot():
+            # Sign once a connection is free, so queueing can't make the Date stale.
+            headers = self.get_headers(method, path)
+            entry = self.cache.get(path) if revalidated else None
+            if entry is not None:
+                # Keep the entry, as others may push it out of the cache meanwhile.
+                headers.update(entry.validators())
+            response = await self.transport.request(
+                method, url, data=data, headers=headers
+            )
+        self.transfer_stats.add(path, response.wire_size, len(response.content))
+        if self.quota is not None:
+            self.quota.add(self.public_key, path, response.wire_size)
+        if raise_errors.get():
+            status_code = response.status_code
+            # A 304 is only an answer when cached data was revalidated.
+            not_modified = status_code == 304 and entry is not None
+            if not (200 <= status_code < 300 or not_modified):
+                try:
+                    body = response.json()
+                except ValueError:
+                    body = None
+                raise ResponseError(method, path, response, body)
+            if not response.content:
+                return response, None
+        if not revalidated:
+            # This may raise json.JSONDecodeError if response is empty:
+            return response, response.json()
+        data, changed = self.cache.update(path, response, entry)
+        if changed:
+            self.response_changed(path, data)
+        return response, data
+
+    def response_changed(self, path, data):
+        """Called when a revalidated path returns new data. Override me!"""
+
+    @contextmanager
+    def raise_for_status(self):
+        """Raise ResponseError for error responses to requests made in this block.
+
+        Outside it, error bodies are returned like any other. In it, an
+        empty 2xx body returns None, rather than failing to decode. Tasks
+        started in the block inherit it."""
+        token = raise_errors.set(True)
+        try:
+            yield
+        finally:
+            raise_errors.reset(token)
+
+    @contextmanager
+    def priority(self, priority, caller=None):
+        """Send requests made in this block with priority, on behalf of caller.
+
+        priority is one of dispatch.INTERACTIVE, NORMAL or BULK. Callers of
+        the same priority take turns, so one caller's pile of requests
+        can't starve another's. Tasks started in the block inherit it."""
+        priority_token = dispatch.current_priority.set(priority)
+        caller_token = dispatch.current_caller.set(caller)
+        try:
+            yield
+        finally:
+            dispatch.current_caller.reset(caller_token)
+            dispatch.current_priority.reset(priority_token)
+
+    async def warm_up(self, connections=None):
+        """Open connections before a burst of requests, so it skips TLS handshakes.
+
+        Defaults to opening as many connections as the session allows."""
+        connections = connections or self._connections
+        await self.transport.warm_up(self.base_location, connections)
+
+    def map(self, fn, items, limit=None):
+        """Await fn(item) for every item, returning their results in order.
+
+        At most `limit` calls run at once, defaulting to the dispatcher's slots.
+        If any call fails, the rest are cancelled and concurrency.MapError
+        is raised with every error. Works under asyncio and trio."""
+        return concurrency.map(fn, items, limit or self.dispatcher.slots)
+
+    def as_completed(self, fn, items, limit=None):
+        """Like map(), but an async context manager yielding (item, result)
+        pairs as the calls finish. See concurrency.as_completed."""
+        return concurrency.as_completed(fn, items, limit or self.dispatcher.slots)
+
+    def record(self, path):
+        """Record requests and responses to a cassette file at path, from now on.
+
+        The cassette is saved when the client is closed. Replay it with
+        cassette.ReplayTransport."""
+        self.transport = cassette.RecordingTransport(self.transport, path)
+
+    async def close(self):
+        await self.transport.close()
+        if self.quota is not None:
+            self.quota.save()
+        await super().close()
+
+    # Full description of all methods: https://api.fieldclimate.com/v1/docs/
+
+    def get_user(self):
+        """Read user information"""
+        path = "/user"
+        return self.request_json("GET", path)
+
+    def put_user(self, data):
+        """Update user information"""
+        path = "/user"
+        return self.request_json("PUT", path, data)
+
+    def delete_user(self):
+        """Delete user account"""
+        path = "/user"
+        return self.request_json("DELETE", path)
+
+    def get_user_stations(self):
+        """Read list of stations of a user"""
+        path = "/user/stations"
+        return self.request_json("GET", path)
+
+    def get_user_licenses(self):
+        """Read user licenses"""
+        path = "/user/licenses"
+        return self.request_json("GET", path)
+
+    def get_system_status(self):
+        """System running correctly"""
+        path = "/system/status"
+        return self.request_json("GET", path)
+
+    def get_system_sensors(self):
+        """Supported sensors"""
+        path = "/system/sensors"
+        return self.request_json("GET", path)
+
+    def get_system_groups(self):
+        """Supported sensor groups"""
+        path = "/system/groups"
+        return self.request_json("GET", path)
+
+    def get_system_group_sensors(self):
+        """Sensors organized in groups"""
+        path = "/system/group/sensors"
+        return self.request_json("GET", path)
+
+    def get_system_types(self):
+        """Type of devices"""
+        path = "/system/types"
+        return self.request_json("GET", path)
+
+    def get_system_countries(self):
+        """Countries for the languages"""
+        path = "/system/countries"
+        return self.request_json("GET", path)
+
+    def get_system_timezones(self):
+        """Timezones"""
+        path = "/system/timezones"
+        return self.request_json("GET", path)
+
+    def get_system_diseases(self):
+        """Disease models"""
+        path = "/system/diseases"
+        return self.request_json("GET", path)
+
+    def get_station(self, station):
+        """Read station information"""
+        station = clean.station(station)
+        path = f"/station/{station}"
+        return self.request_json("GET", path)
+
+    def put_station(self, station, data):
+        """Update station information"""
+        station = clean.station(station)
+        path = f"/station/{station}"
+        return self.request_json("PUT", path, data)
+
+    def get_station_sensors(self, station):
+        """Get list of sensors of a station"""
+        station = clean.station(station)
+        path = f"/station/{station}/sensors"
+        return self.request_json("GET", path)
+
+    def put_station_sensors(self, station, data):
+        """Update station sensor name"""
+        station = clean.station(station)
+        path = f"/station/{station}/sensors"
+        return self.request_json("PUT", path, data)
+
+    def get_station_nodes(self, station):
+        """Get list of nodes (wireless devices) connected to a station"""
+        station = clean.station(station)
+        path = f"/station/{station}/nodes"
+        return self.request_json("GET", path)
+
+    def put_station_nodes(self, station, data):
+        """Update the name of a node itself"""
+        station = clean.station(station)
+        path = f"/station/{station}/nodes"
+        return self.request_json("PUT", path, data)
+
+    def get_station_serials(self, station):
+        """List of serials (of a sensor) and their names"""
+        station = clean.station(station)
+        path = f"/station/{station}/serials"
+        return self.request_json("GET", path)
+
+    def put_station_serials(self, station, data):
+        """Update sensor with serial the name"""
+        station = clean.station(station)
+        path = f"/station/{station}/serials"
+        return self.request_json("PUT", path, data)
+
+    def post_station_key(self, station, station_key, data):
+        """Add station to user account"""
+        station = clean.station(station)
+        path = f"/station/{station}/{station_key}"
+        return self.request_json("POST", path, data)
+
+    def delete_station_key(self, station, station_key):
+        """Remove station from user account"""
+        station = clean.station(station)
+        path = f"/station/{station}/{station_key}"
+        return self.request_json("DELETE", path)
+
+    def get_stations_in_proximity(self, station, radius):
+        """Stations in close proximity of specified station"""
+        station = clean.station(station)
+        path = f"/station/{station}/proximity/{radius}"
+        return self.request_json("GET", path)
+
+    def get_station_events_last(self, station, amount, sort):
+        """Last station events"""
+        station = clean.station(station)
+        sort = clean.sort(sort)
+        path = f"/station/{station}/events/last/{amount}/{sort}"
+        return self.request_json("GET", path)
+
+    def get_station_events(self, station, t_from, t_to, sort):
+        """Station events from to"""
+        station = clean.station(station)
+        t_from, t_to = clean.time(t_from, t_to)
+        sort = clean.sort(sort)
+        path = f"/station/{station}/events/from/{t_from}/to/{t_to}/{sort}"
+        return self.request_json("GET", path)
+
+    def get_station_history_last(self, station, filter, amount, sort):
+        """Last station communication history filter"""
+        station = clean.station(station)
+        filter = clean.filter(filter)
+        sort = clean.sort(sort)
+        path = f"/station/{station}/history/{filter}/last/{amount}/{sort}"
+        return self.request_json("GET", path)
+
+    def get_station_history(self, station, filter, t_from, t_to, sort):
+        """Station communication history from to filter"""
+        station = clean.station(station)
+        filter = clean.filter(filter)
+        t_from, t_to = clean.time(t_from, t_to)
+        sort = clean.sort(sort)
+        path = f"/station/{station}/history/{filter}/from/{t_from}/to/{t_to}/{sort}"
+        return self.request_json("GET", path)
+
+    def get_station_licenses(self, station):
+        """Station licenses for disease models or forecast"""
+        station = clean.station(station)
+        path = f"/station/{station}/licenses"
+        return self.request_json("GET", path)
+
+    def get_data_range(self, station):
+        """Min and Max date of data availability"""
+        station = clean.station(station)
+        path = f"/data/{station}"
+        return self.request_json("GET", path)
+
+    def get_data_last(self, format, station, data_group, time_period):
+        """Reading last data"""
+        format = clean.format(format)
+        station = clean.station(station)
+        data_group = clean.data_group(data_group)
+        time_period = clean.time_period(time_period)
+        path = f"/data/{format}/{station}/{data_group}/last/{time_period}"
+        return self.request_json("GET", path)
+
+    def get_data(self, format, station, data_group, t_from, t_to):
+        """Reading data of specific time period"""
+        format = clean.format(format)
+        station = clean.station(station)
+        t_from, t_to = clean.time(t_from, t_to)
+        data_group = clean.data_group(data_group)
+        path = f"/data/{format}/{station}/{data_group}/from/{t_from}/to/{t_to}"
+        return self.request_json("GET", path)
+
+    def post_data_last(self, format, station, data_group, time_period, data):
+        """Filtered/Customized reading of last data"""
+        format = clean.format(format)
+        station = clean.station(station)
+        data_group = clean.data_group(data_group)
+        time_period = clean.time_period(time_period)
+        path = f"/data/{format}/{station}/{data_group}/last/{time_period}"
+        return self.request_json("POST", path, data)
+
+    def post_data(self, format, station, data_group, t_from, t_to, data):
+        """Filtered/Customized reading of specified time period"""
+        format = clean.format(format)
+        station = clean.station(station)
+        t_from, t_to = clean.time(t_from, t_to)
+        data_group = clean.data_group(data_group)
+        path = f"/data/{format}/{station}/{data_group}/from/{t_from}/to/{t_to}"
+        return self.request_json("POST", path, data)
+
+    def get_forecast(self, station, forecast_option):
+        """Forecast data package or image"""
+        station = clean.station(station)
+        path = f"/forecast/{station}/{forecast_option}"
+        return self.request_json("GET", path)
+
+    def get_disease_last(self, station, time_period):
+        """Get last Evapotranspiration"""
+        station = clean.station(station)
+        time_period = clean.time_period(time_period)
+        path = f"/disease/{station}/last/{time_period}"
+        return self.request_json("GET", path)
+
+    def get_disease(self, station, t_from, t_to):
+        """Get Evapotranspiration for specified period"""
+        station = clean.station(station)
+        t_from, t_to = clean.time(t_from, t_to)
+        path = f"/disease/{station}/from/{t_from}/to/{t_to}"
+        return self.request_json("GET", path)
+
+    def post_disease_last(self, station, time_period, data):
+        """Get last specified disease model"""
+        station = clean.station(station)
+        time_period = clean.time_period(time_period)
+        path = f"/disease/{station}/last/{time_period}"
+        return self.request_json("POST", path, data)
+
+    def post_disease(self, station, t_from, t_to, data):
+        """Get specified disease model for period"""
+        station = clean.station(station)
+        t_from, t_to = clean.time(t_from, t_to)
+        path = f"/disease/{station}/from/{t_from}/to/{t_to}"
+        return self.request_json("POST", path, data)
+
+    def get_chart_last(self, type, station, data_group, time_period):
+        """Charting last data"""
+        station = clean.station(station)
+        data_group = clean.data_group(data_group)
+        time_period = clean.time_period(time_period)
+        path = f"/chart/{type}/{station}/{data_group}/last/{time_period}"
+        return self.request_json("GET", path)
+
+    def get_chart(self, type, station, data_group, t_from, t_to):
+        """Charting for period"""
+        station = clean.station(station)
+        t_from, t_to = clean.time(t_from, t_to)
+        data_group = clean.data_group(data_group)
+        path = f"/chart/{type}/{station}/{data_group}/from/{t_from}/to/{t_to}"
+        return self.request_json("GET", path)
+
+    def post_chart_last(self, type, station, data_group, time_period, data):
+        """Charting customized last data"""
+        station = clean.station(station)
+        data_group = clean.data_group(data_group)
+        time_period = clean.time_period(time_period)
+        path = f"/chart/{type}/{station}/{data_group}/last/{time_period}"
+        return self.request_json("POST", path, data)
+
+    def post_chart(self, type, station, data_group, t_from, t_to, data):
+        """Charting customized for period"""
+        station = clean.station(station)
+        t_from, t_to = clean.time(t_from, t_to)
+        data_group = clean.data_group(data_group)
+        path = f"/chart/{type}/{station}/{data_group}/from/{t_from}/to/{t_to}"
+        return self.request_json("POST", path, data)
+
+    def get_charts(self, charts, limit=None):
+        """Fetch many charts at once, returning them in order.
+
+        charts are tuples of get_chart_last() or get_chart() arguments:
+        (type, station, data_group, time_period) or
+        (type, station, data_group, t_from, t_to)."""
+
+        def chart(args):
+            if len(args) == 4:
+                return self.get_chart_last(*args)
+            return self.get_chart(*args)
+
+        return self.map(chart, charts, limit)
+
+    def get_camera(self, station):
+        """Read station information"""
+        station = clean.station(station)
+        path = f"/camera/{station}/photos/info"
+        return self.request_json("GET", path)
+
+    def get_camera_photos_last(self, station, amount, camera):
+        """Last amount of pictures"""
+        station = clean.station(station)
+        path = f"/camera/{station}/photos/last/{amount}/{camera}"
+        return self.request_json("GET", path)
+
+    def get_camera_photos(self, station, t_from, t_to, camera):
+        """Retrieve pictures for specified period"""
+        station = clean.station(station)
+        t_from, t_to = clean.time(t_from, t_to)
+        path = f"/camera/{station}/photos/from/{t_from}/to/{t_to}/{camera}"
+        return self.request_json("GET", path)
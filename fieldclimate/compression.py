@@ -0,0 +1,157 @@
+"""Negotiate compressed responses, decode them, and count how many bytes
+each endpoint sends over the wire.
+
+Decoder takes a body a chunk at a time. AsksTransport can only tell the
+Content-Encoding once asks has received the whole body, so it buffers
+the compressed chunks and decodes them after. HttpxTransport leaves
+decoding to httpx, which decodes as the body streams in.
+
+gzip and deflate are always supported. brotli and zstd are supported when
+the brotli and zstandard packages are installed."""
+
+__all__ = ["accept_encoding", "Decoder", "TransferStats"]
+
+import zlib
+from functools import lru_cache
+from importlib.util import find_spec
+
+
+class ZlibDecoder:
+    def __init__(self, wbits):
+        self.decompressor = zlib.decompressobj(wbits=wbits)
+
+    def decompress(self, data):
+        return self.decompressor.decompress(data)
+
+    def flush(self):
+        return self.decompressor.flush()
+
+
+class DeflateDecoder(ZlibDecoder):
+    # Some servers send raw deflate streams, without the zlib header.
+    def __init__(self):
+        super().__init__(zlib.MAX_WBITS)
+        self.first_chunk = True
+
+    def decompress(self, data):
+        if self.first_chunk and data:
+            self.first_chunk = False
+            try:
+                return super().decompress(data)
+            except zlib.error:
+                self.decompressor = zlib.decompressobj(wbits=-zlib.MAX_WBITS)
+        return super().decompress(data)
+
+
+class BrotliDecoder:
+    def __init__(self):
+        import brotli
+
+        self.decompressor = brotli.Decompressor()
+
+    def decompress(self, data):
+        return self.decompressor.process(data)
+
+    def flush(self):
+        return b""
+
+
+class ZstdDecoder:
+    def __init__(self):
+        import zstandard
+
+        self.zstd = zstandard.ZstdDecompressor()
+        self.decompressor = self.zstd.decompressobj()
+
+    def decompress(self, data):
+        output = []
+        while data:
+            output.append(self.decompressor.decompress(data))
+            # A body may hold several frames, each needing its own decompressor.
+            data = self.decompressor.unused_data if self.decompressor.eof else b""
+            if data:
+                self.decompressor = self.zstd.decompressobj()
+        return b"".join(output)
+
+    def flush(self):
+        return b""
+
+
+@lru_cache(maxsize=None)
+def available_decoders():
+    # In order of preference, best compression first. brotli and zstandard
+    # are only imported once a response needs them, to keep imports quick.
+    decoders = {}
+    if find_spec("zstandard") is not None:
+        decoders["zstd"] = ZstdDecoder
+    if find_spec("brotli") is not None:
+        decoders["br"] = BrotliDecoder
+    decoders["gzip"] = lambda: ZlibDecoder(zlib.MAX_WBITS | 16)
+    decoders["x-gzip"] = decoders["gzip"]
+    decoders["deflate"] = DeflateDecoder
+    return decoders
+
+
+def accept_encoding() -> str:
+    return ", ".join(name for name in available_decoders() if name != "x-gzip")
+
+
+class Decoder:
+    """Decode a body a chunk at a time, given its Content-Encoding header."""
+
+    def __init__(self, content_encoding=None):
+        encodings = [
+            e.strip().lower() for e in (content_encoding or "").split(",") if e.strip()
+        ]
+        decoders = available_decoders()
+        unknown = set(encodings) - set(decoders) - {"identity"}
+        if unknown:
+            raise ValueError(f"Unsupported Content-Encoding: {content_encoding}")
+        # Encodings are listed in the order they were applied, so undo them in reverse.
+        self.decoders = [decoders[e]() for e in reversed(encodings) if e != "identity"]
+        self.compressed_size = 0
+        self.decompressed_size = 0
+
+    def feed(self, data: bytes) -> bytes:
+        self.compressed_size += len(data)
+        for decoder in self.decoders:
+            data = decoder.decompress(data)
+        self.decompressed_size += len(data)
+        return data
+
+    def finish(self) -> bytes:
+        data = b""
+        for decoder in self.decoders:
+            data = decoder.decompress(data) + decoder.flush()
+        self.decompressed_size += len(data)
+        return data
+
+
+def endpoint(path: str) -> str:
+    # Group paths by their first segment, like '/data' or '/chart'.
+    return "/" + path.lstrip("/").split("/", 1)[0]
+
+
+class TransferStats:
+    """Count responses, and their compressed and decompressed bytes, by endpoint."""
+
+    def __init__(self):
+        self.endpoints = {}
+
+    def add(self, path, compressed_size, decompressed_size):
+        counts = self.endpoints.setdefault(endpoint(path), [0, 0, 0])
+        counts[0] += 1
+        counts[1] += compressed_size
+        counts[2] += decompressed_size
+
+    def report(self):
+        """Return {endpoint: {responses, compressed, decompressed, ratio}}."""
+        return {
+            name: {
+                "responses": responses,
+                "compressed": compressed,
+                "decompressed": decompressed,
+                "ratio": decompressed / compressed if compressed else None,
+            }
+            for name, (responses, compressed, decompressed) in self.endpoints.items()
+        }
@@ -0,0 +1,96 @@
+"""Run coroutine functions over many items at once, under any event loop anyio supports.
+
+These are written once on anyio's task groups, so they behave the same
+under asyncio and trio: at most `limit` calls run at a time, the first
+exception cancels the calls still running, and every exception raised
+before they stopped is collected into one MapError."""
+
+__all__ = ["MapError", "map", "as_completed"]
+
+import math
+
+import anyio
+
+
+class MapError(Exception):
+    """One or more calls failed. errors is a list of (item, exception) pairs."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        messages = "; ".join(f"{item!r}: {error!r}" for item, error in errors)
+        super().__init__(f"{len(errors)} call(s) failed: {messages}")
+
+
+async def worker(fn, items, send, errors, cancel_scope):
+    # Workers share one iterator, so each item is only called once.
+    async with send:
+        for item in items:
+            try:
+                result = await fn(item)
+            except Exception as e:
+                errors.append((item, e))
+                cancel_scope.cancel()
+                return
+            await send.send((item, result))
+
+
+class as_completed:
+    """Call fn(item) for every item, yielding (item, result) pairs as they finish.
+
+    Usage:
+        async with as_completed(client.get_station, stations, limit=10) as results:
+            async for station, result in results:
+                ...
+
+    Leaving the block early cancels the calls still running. At most
+    `limit` finished results wait to be read before calls pause."""
+
+    def __init__(self, fn, items, limit=None):
+        self.fn = fn
+        self.items = items
+        self.limit = limit
+        self.errors = []
+
+    async def __aenter__(self):
+        items = self.items
+        if self.limit is None:
+            items = list(items)
+        workers = self.limit or len(items)
+        send, self.receive = anyio.create_memory_object_stream(workers or math.inf)
+        self.task_group = anyio.create_task_group()
+        await self.task_group.__aenter__()
+        items = iter(items)
+        async with send:
+            for _ in range(workers):
+                args = (self.fn, items, send.clone(), self.errors)
+                self.task_group.start_soon(worker, *args, self.task_group.cancel_scope)
+        return self.receive
+
+    async def __aexit__(self, *exc_info):
+        self.task_group.cancel_scope.cancel()
+        await self.receive.aclose()
+        suppress = await self.task_group.__aexit__(*exc_info)
+        if self.errors:
+            raise MapError(self.errors)
+        return suppress
+
+
+async def map(fn, items, limit=None):
+    """Call fn(item) for every item, returning a list of results in the same order.
+
+    At most `limit` calls run at once."""
+    items = list(items)
+    results = [None] * len(items)
+
+    async def call(indexed):
+        index, item = indexed
+        results[index] = await fn(item)
+
+    try:
+        async with as_completed(call, enumerate(items), limit) as completed:
+            async for _ in completed:
+                pass
+    except MapError as e:
+        # Report the items themselves, rather than their indexes.
+        raise MapError([(item, error) for (_, item), error in e.errors]) from None
+    return results
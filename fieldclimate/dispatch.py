@@ -0,0 +1,124 @@
+"""Priority-aware dispatch of requests onto a limited number of connections.
+
+Each request waits for a slot with a priority class: INTERACTIVE, NORMAL
+(the default) or BULK. Free slots go to the highest priority waiting,
+shared round-robin between callers of that priority. Bulk requests may
+only hold `bulk_share` of the slots at once, so there is always room
+for interactive requests, even in the middle of a big backfill."""
+
+__all__ = ["INTERACTIVE", "NORMAL", "BULK", "Dispatcher"]
+
+import math
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+
+import anyio
+
+INTERACTIVE = 0
+NORMAL = 1
+BULK = 2
+PRIORITIES = (INTERACTIVE, NORMAL, BULK)
+
+# FieldClimateClient.priority() sets these for every request in its block.
+current_priority = ContextVar("fieldclimate_priority", default=NORMAL)
+current_caller = ContextVar("fieldclimate_caller", default=None)
+
+
+class Waiter:
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = anyio.Event()
+        self.granted = False
+
+
+class Slot:
+    """Async context manager holding one of a Dispatcher's slots."""
+
+    def __init__(self, dispatcher, priority, caller):
+        self.dispatcher = dispatcher
+        self.priority = priority
+        self.caller = caller
+
+    async def __aenter__(self):
+        await self.dispatcher.acquire(self.priority, self.caller)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.dispatcher.release(self.priority)
+
+
+class Dispatcher:
+    def __init__(self, slots, bulk_share=0.5):
+        self.slots = slots
+        self.bulk_limit = max(1, math.floor(slots * bulk_share))
+        self.active = 0
+        self.active_bulk = 0
+        # For each priority, an ordered map of caller -> deque of waiters.
+        # Callers are served in turn by moving them to the end after each grant.
+        self.queues = {priority: OrderedDict() for priority in PRIORITIES}
+
+    def slot(self, priority=None, caller=None):
+        """Return an async context manager holding a slot while it's open.
+
+        Priority and caller default to the ones set by the current context."""
+        if priority is None:
+            priority = current_priority.get()
+        if caller is None:
+            caller = current_caller.get()
+        if priority not in PRIORITIES:
+            raise AssertionError(f"priority must be in {PRIORITIES}")
+        return Slot(self, priority, caller)
+
+    def waiting(self, priority=None):
+        priorities = PRIORITIES if priority is None else [priority]
+        return sum(len(w) for p in priorities for w in self.queues[p].values())
+
+    def can_run(self, priority):
+        if self.active >= self.slots:
+            return False
+        return priority != BULK or self.active_bulk < self.bulk_limit
+
+    def take(self, priority):
+        self.active += 1
+        if priority == BULK:
+            self.active_bulk += 1
+
+    async def acquire(self, priority, caller):
+        if not self.queues[priority] and self.can_run(priority):
+            self.take(priority)
+            return
+        waiter = Waiter()
+        callers = self.queues[priority]
+        callers.setdefault(caller, deque()).append(waiter)
+        try:
+            await waiter.event.wait()
+        except BaseException:
+            if waiter.granted:
+                # Cancelled after being handed a slot, so pass it on.
+                self.release(priority)
+            else:
+                callers[caller].remove(waiter)
+                if not callers[caller]:
+                    del callers[caller]
+            raise
+
+    def release(self, priority):
+        self.active -= 1
+        if priority == BULK:
+            self.active_bulk -= 1
+        self.wake()
+
+    def wake(self):
+        for priority in PRIORITIES:
+            callers = self.queues[priority]
+            while callers and self.can_run(priority):
+                caller, waiters = next(iter(callers.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    callers.move_to_end(caller)
+                else:
+                    del callers[caller]
+                self.take(priority)
+                waiter.granted = True
+                waiter.event.set()
@@ -0,0 +1,193 @@
+"""Spread a big job over stations across processes, to use more than one core.
+
+Decoding JSON and transforming rows can keep one core busy while the
+network waits. ShardedExecutor splits stations into one shard per
+process. Each process runs its own event loop and FieldClimateClient,
+and all of them share one rate budget. Results stream back to the
+parent through a bounded queue:
+
+    async def daily_means(client, station):
+        data = await client.get_data("normal", station, "daily", t_from, t_to)
+        return summarize(data)  # CPU heavy work runs in the worker
+
+    executor = ShardedExecutor(daily_means, processes=4, rate=20)
+    for station, summary in executor.map(stations):
+        ...
+
+The job must be importable by the worker processes, so define it at the
+top level of a module."""
+
+__all__ = ["SharedTokenBucket", "ShardedExecutor"]
+
+import multiprocessing
+import os
+import pickle
+import queue
+from time import monotonic
+
+import anyio
+
+from fieldclimate.client import FieldClimateClient
+from fieldclimate.concurrency import MapError
+
+
+class SharedTokenBucket:
+    """A token bucket in shared memory, refilling at `rate` tokens a second.
+
+    Every process holding the bucket draws from the same budget.
+    Requests reserve a token and sleep until it's due, rather than polling."""
+
+    def __init__(self, rate, burst=1, context=multiprocessing):
+        self.rate = rate
+        self.burst = burst
+        # [tokens, time of last update], behind the array's own lock.
+        self.state = context.Array("d", [burst, monotonic()])
+
+    def reserve(self) -> float:
+        """Take a token, returning how many seconds until it may be used."""
+        with self.state.get_lock():
+            tokens, updated = self.state[:]
+            now = monotonic()
+            tokens = min(self.burst, tokens + (now - updated) * self.rate) - 1
+            self.state[:] = [tokens, now]
+        return max(0.0, -tokens / self.rate)
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay:
+            await anyio.sleep(delay)
+
+
+def picklable(error):
+    # Results cross process boundaries, but not every exception can.
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(repr(error))
+
+
+async def work(job, shard, results, bucket, concurrency, client_class, client_kwargs):
+    client = client_class(connections=concurrency, **client_kwargs)
+    # Wait for tokens before taking a connection, so waiting doesn't hold one.
+    client.limiter = bucket
+
+    async def call(station):
+        # One station failing shouldn't stop the rest of the shard.
+        try:
+            return await job(client, station), None
+        except Exception as e:
+            return None, picklable(e)
+
+    async with client:
+        async with client.as_completed(call, shard, concurrency) as completed:
+            async for station, (result, error) in completed:
+                # Block in a thread when the parent falls behind, not the loop.
+                message = (station, result, error)
+                await anyio.to_thread.run_sync(results.put, message)
+
+
+def run_worker(worker_id, job, shard, results, bucket, concurrency, backend, *args):
+    # Always tell the parent this worker is done, and whether it crashed.
+    try:
+        anyio.run(
+            work, job, shard, results, bucket, concurrency, *args, backend=backend
+        )
+    except BaseException as e:
+        results.put((worker_id, picklable(e)))
+        raise
+    results.put((worker_id, None))
+
+
+class ShardedExecutor:
+    """Run `await job(client, station)` for many stations across processes.
+
+    processes defaults to the number of CPUs. Each process makes up to
+    `concurrency` requests at once, and all processes together make no
+    more than `rate` requests per second. At most `buffer` results wait
+    for the parent to collect them before workers pause. client_kwargs
+    are passed to client_class in each worker."""
+
+    def __init__(
+        self,
+        job,
+        processes=None,
+        concurrency=4,
+        rate=None,
+        buffer=64,
+        client_class=FieldClimateClient,
+        client_kwargs=None,
+        backend="asyncio",
+        context="spawn",
+    ):
+        self.job = job
+        self.processes = processes or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.rate = rate
+        self.buffer = buffer
+        self.client_class = client_class
+        self.client_kwargs = client_kwargs or {}
+        self.backend = backend
+        self.context = multiprocessing.get_context(context)
+
+    def map(self, stations):
+        """Yield (station, result) pairs as they arrive from the workers.
+
+        Once every station is done, raises MapError if any of them failed."""
+        stations = list(stations)
+        shards = [stations[i :: self.processes] for i in range(self.processes)]
+        shards = [shard for shard in shards if shard]
+        results = self.context.Queue(self.buffer)
+        bucket = None
+        if self.rate:
+            bucket = SharedTokenBucket(self.rate, context=self.context)
+        workers = [
+            self.context.Process(
+                target=run_worker,
+                args=(
+                    worker_id,
+                    self.job,
+                    shard,
+                    results,
+                    bucket,
+                    self.concurrency,
+                    self.backend,
+                    self.client_class,
+                    self.client_kwargs,
+                ),
+                daemon=True,
+            )
+            for worker_id, shard in enumerate(shards)
+        ]
+        for worker in workers:
+            worker.start()
+        errors = []
+        running = set(range(len(workers)))
+        try:
+            while running:
+                try:
+                    message = results.get(timeout=1)
+                except queue.Empty:
+                    dead = [i for i in running if not workers[i].is_alive()]
+                    if dead and results.empty():
+                        raise RuntimeError(f"Worker processes {dead} died.")
+                    continue
+                if len(message) == 2:
+                    # (worker_id, error) means that worker has finished.
+                    worker_id, error = message
+                    running.discard(worker_id)
+                    if error is not None:
+                        errors.append((f"worker {worker_id}", error))
+                    continue
+                station, result, error = message
+                if error is not None:
+                    errors.append((station, error))
+                else:
+                    yield station, result
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
+        if errors:
+            raise MapError(errors)
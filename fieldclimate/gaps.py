@@ -0,0 +1,248 @@
+"""Find holes in station data, and refetch only the periods that are missing.
+
+Stations go offline, so get_data() periods come back with holes. Rather
+than looping over dates in Python, timestamps are compared against the
+data group's cadence with numpy, and missing intervals are refetched on
+their own instead of pulling whole periods again:
+
+    report = await gaps.check(client, station, "hourly", t_from, t_to, data=data)
+    print(report.ratio, report.gaps)
+    for (gap_from, gap_to), data in await gaps.refetch(client, report):
+        ...
+
+Requires numpy: pip install python-fieldclimate[numpy]"""
+
+__all__ = [
+    "CADENCES",
+    "timestamps",
+    "infer_cadence",
+    "find_gaps",
+    "month_starts",
+    "find_missing",
+    "merge_gaps",
+    "Completeness",
+    "check",
+    "refetch",
+]
+
+from datetime import timedelta
+
+import numpy as np
+
+from fieldclimate import clean, models
+from fieldclimate.times import to_epoch
+
+DAY = 86400
+
+# Seconds between records in each data group. Raw data is logged at a
+# per-station interval, so it's inferred from the data instead. Months
+# vary in length, so monthly data is checked against calendar months.
+CADENCES = {"hourly": 3600, "daily": DAY}
+
+# A step longer than this many cadences means records are missing.
+TOLERANCE = 1.5
+
+
+def timestamps(dates, timezone=None) -> np.ndarray:
+    """Return dates as a sorted array of unique unix timestamps.
+
+    Accepts numbers, or the server's 'YYYY-MM-DD HH:MM:SS' strings in
+    timezone (see fieldclimate.times), UTC by default."""
+    dates = np.asarray(dates)
+    if dates.size == 0:
+        return np.empty(0, dtype="int64")
+    if dates.dtype.kind not in "iuf":
+        dates = to_epoch(dates, timezone)
+    return np.unique(dates.astype("int64"))
+
+
+def infer_cadence(times: np.ndarray, default: int = 900) -> int:
+    """Guess the logging interval of raw data from the most typical step."""
+    steps = np.diff(times)
+    steps = steps[steps > 0]
+    if not steps.size:
+        return default
+    return int(np.median(steps))
+
+
+def find_gaps(times, t_from, t_to, cadence, tolerance=TOLERANCE) -> np.ndarray:
+    """Return an (n, 2) array of [start, end] periods missing from times.
+
+    Each period runs from the first missing record to the last, so it
+    can be requested as is. Missing records at either end of
+    t_from..t_to count too."""
+    times = times[(times >= t_from) & (times <= t_to)]
+    # Pretend there are records just outside the period, to find gaps at its ends.
+    edges = np.concatenate(([t_from - cadence], times, [t_to + cadence]))
+    missing = np.diff(edges) > cadence * tolerance
+    gaps = np.column_stack(
+        (edges[:-1][missing] + cadence, edges[1:][missing] - cadence)
+    )
+    return gaps[gaps[:, 0] <= gaps[:, 1]]
+
+
+def month_starts(t_from, t_to, timezone=None) -> np.ndarray:
+    """Return timestamps of the first of each month between t_from and t_to.
+
+    Months start at midnight in timezone (see fieldclimate.times)."""
+    # Look a day either side, as timezones move month starts by up to 14 hours.
+    first = np.datetime64(t_from - DAY, "s").astype("datetime64[M]")
+    last = np.datetime64(t_to + DAY, "s").astype("datetime64[M]")
+    months = np.arange(first, last + 1).astype("datetime64[s]")
+    starts = to_epoch(months, timezone)
+    return starts[(starts >= t_from) & (starts <= t_to)]
+
+
+def find_missing(times, expected, tolerance) -> np.ndarray:
+    """Return a mask of expected times with no record within tolerance seconds."""
+    if not times.size:
+        return np.ones(expected.shape, dtype=bool)
+    # Compare each expected time with the nearest record on either side.
+    index = np.searchsorted(times, expected)
+    before = times[np.clip(index - 1, 0, times.size - 1)]
+    after = times[np.clip(index, 0, times.size - 1)]
+    nearest = np.minimum(np.abs(expected - before), np.abs(after - expected))
+    return nearest > tolerance
+
+
+def runs(expected, missing) -> np.ndarray:
+    """Return an (n, 2) array of [first, last] expected times in each run of missing."""
+    edges = np.diff(np.concatenate(([0], missing.astype("int8"), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return np.column_stack((expected[starts], expected[ends]))
+
+
+def merge_gaps(gaps: np.ndarray, join: int = 0) -> np.ndarray:
+    """Merge gaps less than `join` seconds apart, so they're fetched in one request."""
+    if len(gaps) < 2:
+        return gaps
+    # Gaps are sorted and don't overlap, so a new group starts after every wide space.
+    starts = np.concatenate(([True], gaps[1:, 0] - gaps[:-1, 1] > join))
+    (indexes,) = np.nonzero(starts)
+    ends = np.concatenate((indexes[1:] - 1, [len(gaps) - 1]))
+    return np.column_stack((gaps[indexes, 0], gaps[ends, 1]))
+
+
+class Completeness:
+    """How much of a station's data arrived between t_from and t_to, and the gaps."""
+
+    __slots__ = (
+        "station",
+        "data_group",
+        "t_from",
+        "t_to",
+        "cadence",
+        "expected",
+        "received",
+        "missing",
+        "gaps",
+    )
+
+    def __init__(
+        self,
+        station,
+        data_group,
+        t_from,
+        t_to,
+        cadence,
+        expected,
+        received,
+        missing,
+        gaps,
+    ):
+        self.station = station
+        self.data_group = data_group
+        self.t_from = t_from
+        self.t_to = t_to
+        # Seconds between records, or None for monthly data.
+        self.cadence = cadence
+        self.expected = expected
+        self.received = received
+        self.missing = missing
+        self.gaps = gaps
+
+    @property
+    def ratio(self) -> float:
+        return 1 - self.missing / self.expected if self.expected > 0 else 1.0
+
+    def to_dict(self):
+        return {
+            "station": self.station,
+            "data_group": self.data_group,
+            "from": self.t_from,
+            "to": self.t_to,
+            "cadence": self.cadence,
+            "expected": self.expected,
+            "received": self.received,
+            "missing": self.missing,
+            "ratio": self.ratio,
+            "gaps": self.gaps.tolist(),
+        }
+
+
+async def last_communication(client, station, t_from, t_to, timezone=None):
+    # Records logged after the station last got through can't be fetched yet.
+    history = await client.get_station_history(station, "success", t_from, t_to, "desc")
+    dates = [entry["date"] for entry in history or () if "date" in entry]
+    times = timestamps(dates, timezone)
+    return int(times[-1]) if times.size else None
+
+
+async def check(
+    client, station, data_group, t_from, t_to, data=None, history=True, timezone=None
+):
+    """Return the Completeness of a station's data between t_from and t_to.
+
+    data is a get_data() response for the period, fetched if not given.
+    With history, the station's communication log is read too, and data
+    the station hasn't uploaded yet isn't counted as missing. Dates are
+    read in timezone, or the station's own if station is a models.Station."""
+    if timezone is None and isinstance(station, models.Station):
+        timezone = station
+    station = clean.station(station)
+    data_group = clean.data_group(data_group)
+    t_from, t_to = (int(t) for t in clean.time(t_from, t_to))
+    if data is None:
+        data = await client.get_data("normal", station, data_group, t_from, t_to)
+    times = timestamps((data or {}).get("dates") or (), timezone)
+    if history:
+        last = await last_communication(client, station, t_from, t_to, timezone)
+        if last is not None:
+            t_to = max(t_from, min(t_to, last))
+    times = times[(times >= t_from) & (times <= t_to)]
+    if data_group == "monthly":
+        # Months vary in length, so compare against each calendar month's start.
+        cadence = None
+        months = month_starts(t_from, t_to, timezone)
+        missing = find_missing(times, months, tolerance=DAY)
+        gaps = runs(months, missing)
+        expected, missing = months.size, int(missing.sum())
+    else:
+        cadence = CADENCES.get(data_group) or infer_cadence(times)
+        gaps = find_gaps(times, t_from, t_to, cadence)
+        expected = (t_to - t_from) // cadence + 1
+        missing = int(((gaps[:, 1] - gaps[:, 0]) // cadence + 1).sum())
+    return Completeness(
+        station, data_group, t_from, t_to, cadence, expected, times.size, missing, gaps
+    )
+
+
+async def refetch(client, report, format="normal", join=0, chunk=timedelta(days=7)):
+    """Fetch just the gaps in a Completeness report.
+
+    Gaps less than `join` seconds apart are fetched together, and long
+    gaps are split into `chunk` sized requests. Returns a list of
+    ((t_from, t_to), data) pairs, oldest first."""
+    chunk = int(chunk.total_seconds())
+    periods = [
+        (t, min(t + chunk - 1, end))
+        for start, end in merge_gaps(report.gaps, join).tolist()
+        for t in range(start, end + 1, chunk)
+    ]
+
+    async def fetch(period):
+        args = (format, report.station, report.data_group, *period)
+        return await client.get_data(*args)
+
+    return list(zip(periods, await client.map(fetch, periods)))
@@ -0,0 +1,70 @@
+"""An HTTP/2 transport built on httpx, which must be installed separately.
+
+HttpxTransport multiplexes many requests over a few connections, so
+bursts of requests don't each need their own TCP and TLS handshake.
+Install it with: pip install python-fieldclimate[http2]"""
+
+__all__ = ["HttpxTransport"]
+
+import anyio
+import httpx
+
+from fieldclimate.transport import Response
+
+
+class HttpxTransport:
+    """Send requests through httpx, multiplexing them over HTTP/2 connections.
+
+    Usage:
+        transport = HttpxTransport(connections=4)
+        async with FieldClimateClient(transport=transport) as client:
+            ...
+
+    Over HTTP/2, each connection carries up to `streams` requests at once,
+    so max_concurrency is connections * streams. Servers usually allow
+    100 streams per connection.
+
+    httpx supports asyncio and trio, but not curio.
+    Extra kwargs are passed on to httpx.AsyncClient."""
+
+    def __init__(
+        self,
+        connections=10,
+        http2=True,
+        keepalive_expiry=5.0,
+        max_keepalive_connections=None,
+        streams=100,
+        **client_kwargs,
+    ):
+        self.max_concurrency = connections * streams if http2 else connections
+        limits = httpx.Limits(
+            max_connections=connections,
+            max_keepalive_connections=max_keepalive_connections or connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.client = httpx.AsyncClient(http2=http2, limits=limits, **client_kwargs)
+
+    async def request(self, method, url, data=None, headers=None):
+        # Match asks: dicts are form encoded, strings and bytes are sent as-is.
+        body = {"content": data} if isinstance(data, (str, bytes)) else {"data": data}
+        response = await self.client.request(method, url, headers=headers, **body)
+        # httpx decodes gzip, deflate, br and zstd bodies as they stream in.
+        return Response(
+            response.status_code,
+            response.headers,
+            response.content,
+            response.num_bytes_downloaded,
+        )
+
+    async def warm_up(self, url, connections):
+        # httpx has no api to open idle connections, so send cheap requests instead.
+        # Over HTTP/2, they will share a single connection.
+        async def connect():
+            await self.client.head(url)
+
+        async with anyio.create_task_group() as tg:
+            for _ in range(connections):
+                tg.start_soon(connect)
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,161 @@
+"""Compact models for station, sensor, node and data responses.
+
+Client methods return plain JSON. These optional models pick out the
+fields most code needs and let the rest of the response be freed, which
+matters when holding metadata for thousands of stations:
+
+    stations = [Station(s) for s in await client.get_user_stations()]
+    await client.get_data_range(stations[0])
+
+Models use __slots__, share repeated strings like units, store data
+values in flat arrays, and only parse dates when they are accessed."""
+
+__all__ = ["Station", "Sensor", "Node", "DataSeries"]
+
+import math
+import sys
+from array import array
+from datetime import datetime, timezone
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def dig(raw, path):
+    # Follow a path of keys into nested JSON, or return None if it isn't there.
+    for key in path:
+        try:
+            raw = raw[key]
+        except (TypeError, KeyError, IndexError):
+            return None
+    return raw
+
+
+def intern(value):
+    # Units, codes and groups repeat across a fleet, so share one copy of each.
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def parse_date(value):
+    if value is None:
+        return None
+    return datetime.strptime(value, DATE_FORMAT).replace(tzinfo=timezone.utc)
+
+
+class Model:
+    """Copies `fields` out of a raw JSON dict into slots.
+
+    fields maps each attribute name to its path of keys in the raw JSON.
+    Attributes listed in `shared` are interned."""
+
+    __slots__ = ()
+    fields = {}
+    shared = ()
+
+    def __init__(self, raw):
+        for name, path in self.fields.items():
+            value = dig(raw, path)
+            setattr(self, name, intern(value) if name in self.shared else value)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {getattr(self, 'name', None)!r}>"
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Station(Model):
+    """A station, as returned by get_user_stations() or get_station()."""
+
+    fields = {
+        "id": ("name", "original"),
+        "name": ("name", "custom"),
+        "device_id": ("info", "device_id"),
+        "firmware": ("info", "firmware"),
+        "timezone_offset": ("config", "timezone_offset"),
+        "longitude": ("position", "geo", "coordinates", 0),
+        "latitude": ("position", "geo", "coordinates", 1),
+        "altitude": ("position", "altitude"),
+        "min_date_raw": ("dates", "min_date"),
+        "max_date_raw": ("dates", "max_date"),
+        "last_communication_raw": ("dates", "last_communication"),
+    }
+    shared = ("firmware",)
+    __slots__ = tuple(fields)
+
+    def __repr__(self):
+        return f"<Station {self.id!r}>"
+
+    @property
+    def min_date(self):
+        return parse_date(self.min_date_raw)
+
+    @property
+    def max_date(self):
+        return parse_date(self.max_date_raw)
+
+    @property
+    def last_communication(self):
+        return parse_date(self.last_communication_raw)
+
+
+class Sensor(Model):
+    """A sensor, as returned by get_station_sensors()."""
+
+    fields = {
+        "name": ("name",),
+        "name_custom": ("name_custom",),
+        "unit": ("unit",),
+        "code": ("code",),
+        "ch": ("ch",),
+        "group": ("group",),
+        "serial": ("serial",),
+        "mac": ("mac",),
+        "decimals": ("decimals",),
+        "is_active": ("isActive",),
+    }
+    shared = ("name", "unit", "group")
+    __slots__ = tuple(fields)
+
+
+class Node(Model):
+    """A node (wireless device), as returned by get_station_nodes()."""
+
+    fields = {"serial": ("serial",), "name": ("name",), "type": ("type",)}
+    shared = ("type",)
+    __slots__ = tuple(fields)
+
+
+class DataSeries(Model):
+    """One sensor's values from a get_data() response in 'normal' format.
+
+    Values are stored per aggregation (like 'avg' or 'max') in arrays of
+    doubles, with NaN where the server sent null. Every series from the
+    same response shares one tuple of dates."""
+
+    fields = {
+        "name": ("name",),
+        "unit": ("unit",),
+        "code": ("code",),
+        "ch": ("ch",),
+        "serial": ("serial",),
+        "mac": ("mac",),
+    }
+    shared = ("name", "unit")
+    __slots__ = (*fields, "dates", "values")
+
+    def __init__(self, raw, dates=()):
+        super().__init__(raw)
+        self.dates = dates
+        self.values = {
+            intern(aggr): array("d", (math.nan if v is None else v for v in values))
+            for aggr, values in (raw.get("values") or {}).items()
+        }
+
+    @classmethod
+    def from_response(cls, response):
+        """Return a list of DataSeries for every sensor in a get_data() response."""
+        dates = tuple(response.get("dates") or ())
+        return [cls(raw, dates) for raw in response.get("data") or ()]
+
+    def parsed_dates(self):
+        return [parse_date(date) for date in self.dates]
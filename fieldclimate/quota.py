@@ -0,0 +1,154 @@
+"""Count requests against daily quotas, and spread bulk work across the day.
+
+The API throttles accounts that send too many requests in a day. A
+QuotaTracker counts requests and bytes per account, endpoint and UTC
+day, and saves the counts to a JSON file so they survive restarts:
+
+    quota = QuotaTracker("quota.json", limits={"*": 20000, "/data": 10000})
+    async with FieldClimateClient(quota=quota) as client:
+        with client.priority(dispatch.BULK):
+            await backfill(client)
+
+Interactive and normal requests are only counted. Bulk requests are
+paced so the budget left, less a `reserve` share kept for everything
+else, lasts until the end of the day. Once it's spent, bulk requests
+wait for the next day."""
+
+__all__ = ["QuotaTracker"]
+
+import json
+import os
+import time
+
+import anyio
+
+from fieldclimate import dispatch
+from fieldclimate.compression import endpoint
+
+DAY = 86400
+
+
+class QuotaTracker:
+    """Count requests and bytes by account, endpoint and day.
+
+    limits maps endpoints like "/data" to the requests allowed per day,
+    with "*" limiting all endpoints together. If path is given, counts
+    are loaded from it, and saved at most every save_interval seconds
+    and by save(). Days older than keep_days are forgotten."""
+
+    def __init__(
+        self,
+        path=None,
+        limits=None,
+        reserve=0.2,
+        save_interval=5.0,
+        keep_days=31,
+        clock=time.time,
+    ):
+        self.path = path
+        self.limits = limits or {}
+        self.reserve = reserve
+        self.save_interval = save_interval
+        self.keep_days = keep_days
+        self.clock = clock
+        # {day: {account: {endpoint: [requests, bytes]}}}, with days as "YYYY-MM-DD".
+        self.days = {}
+        # When the next bulk request may go, by (account, limit).
+        self.next_bulk = {}
+        self.saved = clock()
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                self.days = json.load(f)
+
+    def day(self, now=None):
+        now = self.clock() if now is None else now
+        return time.strftime("%Y-%m-%d", time.gmtime(now))
+
+    def counts(self, account, day=None):
+        return self.days.get(day or self.day(), {}).get(account, {})
+
+    def used(self, account, name, day=None):
+        """Requests sent today for an endpoint, or for all of them if name is "*"."""
+        counts = self.counts(account, day)
+        if name == "*":
+            return sum(requests for requests, _ in counts.values())
+        return counts.get(name, (0, 0))[0]
+
+    def remaining(self, account, path):
+        """Requests left today for path, under its tightest limit (or None)."""
+        left = [
+            limit - self.used(account, name)
+            for name, limit in self.applicable(path).items()
+        ]
+        return min(left) if left else None
+
+    def usage(self, account, day=None):
+        """Return {endpoint: {requests, bytes}} for an account on day (UTC today)."""
+        return {
+            name: {"requests": requests, "bytes": size}
+            for name, (requests, size) in self.counts(account, day).items()
+        }
+
+    def applicable(self, path):
+        name = endpoint(path)
+        return {key: self.limits[key] for key in ("*", name) if key in self.limits}
+
+    def add(self, account, path, size):
+        """Count a request for path that received size bytes."""
+        day = self.day()
+        if day not in self.days:
+            self.forget_old_days()
+        endpoints = self.days.setdefault(day, {}).setdefault(account, {})
+        counts = endpoints.setdefault(endpoint(path), [0, 0])
+        counts[0] += 1
+        counts[1] += size
+        if self.path is not None and self.clock() - self.saved >= self.save_interval:
+            self.save()
+
+    def forget_old_days(self):
+        oldest = self.day(self.clock() - self.keep_days * DAY)
+        for day in [day for day in self.days if day < oldest]:
+            del self.days[day]
+
+    def reserve_turn(self, account, path, now):
+        """Return when a bulk request for path may go, or None if today's budget is spent.
+
+        Each call takes the next turn, so bulk requests queued at once are
+        spaced evenly over what's left of the day."""
+        day_end = (now // DAY + 1) * DAY
+        intervals = {}
+        for name, limit in self.applicable(path).items():
+            # Bulk requests may spend what's left of the budget, less the reserve.
+            budget = limit * (1 - self.reserve) - self.used(account, name)
+            if budget < 1:
+                return None
+            intervals[(account, name)] = (day_end - now) / budget
+        turn = max([now, *(self.next_bulk.get(key, now) for key in intervals)])
+        for key, interval in intervals.items():
+            self.next_bulk[key] = turn + interval
+        return turn
+
+    async def wait(self, account, path, priority=None):
+        """Wait until a request for path fits the budget. Only bulk requests wait."""
+        if priority is None:
+            priority = dispatch.current_priority.get()
+        if priority != dispatch.BULK:
+            return
+        while True:
+            now = self.clock()
+            turn = self.reserve_turn(account, path, now)
+            if turn is not None:
+                break
+            # Today's budget is spent, so queue again for tomorrow's.
+            await anyio.sleep((now // DAY + 1) * DAY - now)
+        if turn > now:
+            await anyio.sleep(turn - now)
+
+    def save(self):
+        if self.path is None:
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.days, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+        self.saved = self.clock()
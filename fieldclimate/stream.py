@@ -0,0 +1,201 @@
+"""Stream station events and communication history, yielding each entry once.
+
+get_station_events() and get_station_history() return whole lists, so
+polling them with overlapping windows sees the same entries again and
+again. A LogStream pages through periods in bounded chunks, remembers
+how far it got for each station, and drops entries it has already
+yielded:
+
+    stream = LogStream(client, "events")
+    async for station, event in stream.monitor(stations, interval=60):
+        ...
+
+Each poll starts `overlap` seconds before the station's cursor, so late
+entries aren't missed, and the seen-set hides the repeats. The seen-set
+only lives as long as the stream, so after a restart, entries from the
+last `overlap` seconds before the saved cursors are yielded again."""
+
+__all__ = ["SeenSet", "LogStream"]
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+import anyio
+
+from fieldclimate import clean
+from fieldclimate.cache import digest
+
+logger = logging.getLogger(__name__)
+
+
+class SeenSet:
+    """A set remembering up to max_size keys, forgetting the oldest first."""
+
+    def __init__(self, max_size=100_000):
+        self.max_size = max_size
+        self.keys = OrderedDict()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def add(self, key) -> bool:
+        """Add key, returning False if it was already there."""
+        if key in self.keys:
+            return False
+        self.keys[key] = None
+        if len(self.keys) > self.max_size:
+            self.keys.popitem(last=False)
+        return True
+
+
+def entry_key(entry):
+    # Entries with an id are told apart by it. Otherwise, by their contents.
+    if isinstance(entry, dict) and "_id" in entry:
+        return str(entry["_id"])
+    return digest(json.dumps(entry, sort_keys=True).encode())
+
+
+class LogStream:
+    """Page through a log ("events" or "history") of many stations.
+
+    Periods are fetched `chunk` at a time, oldest first. cursors holds
+    the end of the last period fetched for each station; pass a
+    sync.Checkpoint as checkpoint to keep them between runs. It's saved
+    after every poll(), and at most every save_interval seconds while
+    reading entries(). History is read with `filter`. Up to seen_size
+    entries are remembered in memory, to drop repeats from overlapping
+    periods."""
+
+    def __init__(
+        self,
+        client,
+        log="events",
+        filter="success",
+        chunk=timedelta(days=1),
+        overlap=timedelta(hours=1),
+        seen_size=100_000,
+        checkpoint=None,
+        save_interval=5.0,
+        clock=time.time,
+    ):
+        if log not in ("events", "history"):
+            raise AssertionError('log argument must be in ["events", "history"]')
+        self.client = client
+        self.log = log
+        self.filter = clean.filter(filter)
+        self.chunk = int(chunk.total_seconds())
+        self.overlap = int(overlap.total_seconds())
+        self.seen = SeenSet(seen_size)
+        self.checkpoint = checkpoint
+        self.save_interval = save_interval
+        self.clock = clock
+        self.saved = clock()
+        self.cursors = {}
+
+    def cursor(self, station):
+        if station not in self.cursors and self.checkpoint is not None:
+            self.cursors[station] = self.checkpoint.get(station, self.log)
+        return self.cursors.get(station)
+
+    def move_cursor(self, station, position):
+        self.cursors[station] = position
+        if self.checkpoint is not None:
+            # Rewriting the file for every chunk would be slow with many stations.
+            self.checkpoint.set(station, self.log, position)
+            if self.clock() - self.saved >= self.save_interval:
+                self.save()
+
+    def save(self):
+        """Write the cursors to the checkpoint file, if there is one."""
+        if self.checkpoint is not None:
+            self.checkpoint.save()
+        self.saved = self.clock()
+
+    async def fetch(self, station, t_from, t_to):
+        # Error responses raise, so the cursor stays before the period.
+        with self.client.raise_for_status():
+            if self.log == "events":
+                entries = await self.client.get_station_events(
+                    station, t_from, t_to, "asc"
+                )
+            else:
+                entries = await self.client.get_station_history(
+                    station, self.filter, t_from, t_to, "asc"
+                )
+        # Empty periods may come back empty, or as something other than a list.
+        return entries if isinstance(entries, list) else []
+
+    async def entries(self, station, t_from=None, t_to=None):
+        """Yield new entries for station between t_from and t_to, oldest chunk first.
+
+        t_from defaults to just before the station's cursor, or one chunk
+        before t_to for a station not seen yet. t_to defaults to now.
+        Error responses raise client.ResponseError, leaving the cursor at
+        the end of the last period read."""
+        station = clean.station(station)
+        t_to = int(next(clean.time(t_to))) if t_to is not None else int(self.clock())
+        if t_from is not None:
+            t_from = int(next(clean.time(t_from)))
+        elif self.cursor(station) is not None:
+            t_from = self.cursor(station) - self.overlap
+        else:
+            t_from = t_to - self.chunk
+        for start in range(t_from, t_to, self.chunk):
+            end = min(start + self.chunk, t_to)
+            for entry in await self.fetch(station, start, end):
+                if self.seen.add((station, entry_key(entry))):
+                    yield entry
+            if end > (self.cursor(station) or 0):
+                self.move_cursor(station, end)
+
+    async def poll(self, stations, limit=None, errors=None):
+        """Fetch new entries for every station at once, returning (station, entries) pairs.
+
+        If errors is a list, stations that fail are added to it as
+        (station, exception) pairs with the entries read before the
+        failure, instead of raising MapError."""
+
+        async def new_entries(station):
+            found = []
+            try:
+                async for entry in self.entries(station):
+                    found.append(entry)
+            except Exception as e:
+                if errors is None:
+                    raise
+                errors.append((station, e))
+            return found
+
+        try:
+            async with self.client.as_completed(
+                new_entries, stations, limit
+            ) as results:
+                return [(station, entries) async for station, entries in results]
+        finally:
+            self.save()
+
+    async def monitor(self, stations, interval=60, limit=None, on_error=None):
+        """Poll stations every interval seconds forever, yielding (station, entry) pairs.
+
+        A station that fails is tried again at the next poll, from its
+        cursor. on_error(station, exception) is called for each failure,
+        which is logged by default."""
+        stations = list(stations)
+        while True:
+            started = self.clock()
+            errors = []
+            for station, entries in await self.poll(stations, limit, errors):
+                for entry in entries:
+                    yield station, entry
+            for station, error in errors:
+                if on_error is not None:
+                    on_error(station, error)
+                else:
+                    logger.warning("Polling station %s failed: %r", station, error)
+            await anyio.sleep(max(0, started + interval - self.clock()))
@@ -0,0 +1,375 @@
+"""Bulk sync station data into a local store, resuming from a checkpoint file.
+
+Installed as the ``fieldclimate`` console command. Run ``fieldclimate --help``.
+"""
+
+__all__ = ["Checkpoint", "Store", "RateLimiter", "Progress", "sync", "main"]
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import anyio
+
+from fieldclimate import FieldClimateClient, clean, concurrency
+from fieldclimate.cassette import ReplayTransport
+from fieldclimate.client import ResponseError
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_date(value: str) -> datetime:
+    # Server reports data ranges like '2019-09-23 10:00:00'.
+    # Command line users may also leave off the time.
+    for fmt in (DATE_FORMAT, "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    raise ValueError(f"Dates must look like 'YYYY-MM-DD[ HH:MM:SS]', not {value!r}")
+
+
+class Checkpoint:
+    """Remember the last synced timestamp for each station and data group.
+
+    The file is rewritten atomically after every update, so an interrupted
+    sync loses at most the chunk it was fetching."""
+
+    def __init__(self, path):
+        self.path = path
+        self.positions = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.positions = json.load(f)
+
+    @staticmethod
+    def key(station, data_group):
+        return f"{station}/{data_group}"
+
+    def get(self, station, data_group):
+        return self.positions.get(self.key(station, data_group))
+
+    def set(self, station, data_group, timestamp):
+        """Change a position without saving it. See save()."""
+        self.positions[self.key(station, data_group)] = int(timestamp)
+
+    def update(self, station, data_group, timestamp):
+        self.set(station, data_group, timestamp)
+        self.save()
+
+    def save(self):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.positions, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+class Store:
+    """Append fetched chunks to one JSON lines file per station and data group."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, station, data_group):
+        return os.path.join(self.directory, station, f"{data_group}.jsonl")
+
+    def write(self, station, data_group, t_from, t_to, data):
+        path = self.path(station, data_group)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        line = json.dumps({"from": t_from, "to": t_to, "data": data})
+        with open(path, "a") as f:
+            f.write(line + "\n")
+
+
+class RateLimiter:
+    """Space out callers of wait() so no more than `rate` pass per second."""
+
+    def __init__(self, rate=None):
+        self.interval = 1 / rate if rate else 0
+        self.next_time = 0
+        self.lock = anyio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = anyio.current_time()
+            if self.next_time > now:
+                await anyio.sleep(self.next_time - now)
+                now = self.next_time
+            self.next_time = now + self.interval
+
+
+class Progress:
+    """Track throughput and estimate remaining time of a sync."""
+
+    def __init__(self, total_chunks, out=sys.stderr, interval=1.0):
+        self.total_chunks = total_chunks
+        self.done_chunks = 0
+        self.records = 0
+        # (station, data_group, error) for each period stopped by an error.
+        self.failed = []
+        self.out = out
+        self.interval = interval
+        self.started = anyio.current_time()
+        self.last_report = self.started
+
+    def add(self, records):
+        self.done_chunks += 1
+        self.records += records
+        now = anyio.current_time()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report()
+
+    def fail(self, station, data_group, error):
+        self.failed.append((station, data_group, error))
+        print(f"{station}/{data_group} stopped: {error}", file=self.out)
+
+    def stats(self):
+        elapsed = max(anyio.current_time() - self.started, 1e-9)
+        rate = self.done_chunks / elapsed
+        remaining = self.total_chunks - self.done_chunks
+        eta = remaining / rate if rate else None
+        return {
+            "chunks": self.done_chunks,
+            "total_chunks": self.total_chunks,
+            "records": self.records,
+            "failed": len(self.failed),
+            "elapsed": elapsed,
+            "chunks_per_second": rate,
+            "records_per_second": self.records / elapsed,
+            "eta": eta,
+        }
+
+    def report(self, final=False):
+        s = self.stats()
+        eta = "--:--:--" if s["eta"] is None else str(timedelta(seconds=int(s["eta"])))
+        label = "done" if final else f"eta {eta}"
+        if s["failed"]:
+            label += f", {s['failed']} failed"
+        print(
+            f"{s['chunks']}/{s['total_chunks']} chunks, {s['records']} records, "
+            f"{s['chunks_per_second']:.2f} chunks/s, "
+            f"{s['records_per_second']:.1f} records/s, {label}",
+            file=self.out,
+        )
+
+
+def count_records(data) -> int:
+    # Both 'normal' and 'optimized' formats list one date per record.
+    try:
+        return len(data["dates"])
+    except (TypeError, KeyError):
+        return 0
+
+
+def chunk_period(t_from: int, t_to: int, chunk: int):
+    # The server includes both ends of a period, so chunks mustn't share them.
+    for start in range(t_from, t_to + 1, chunk):
+        yield start, min(start + chunk - 1, t_to)
+
+
+async def plan(
+    client,
+    stations,
+    data_groups,
+    checkpoint,
+    since=None,
+    until=None,
+    limit=4,
+    limiter=None,
+):
+    """Return a list of (station, data_group, t_from, t_to) periods to sync.
+
+    Data ranges are read for up to `limit` stations at once, waiting on limiter."""
+
+    async def get_data_range(station):
+        if limiter is not None:
+            await limiter.wait()
+        return await client.get_data_range(station)
+
+    data_ranges = await concurrency.map(get_data_range, stations, limit)
+    periods = []
+    for station, data_range in zip(stations, data_ranges):
+        try:
+            min_date = parse_date(data_range["min_date"])
+            max_date = parse_date(data_range["max_date"])
+        except (TypeError, KeyError):
+            # Stations without any data have nothing to sync.
+            continue
+        start = max(since, min_date) if since else min_date
+        end = min(until, max_date) if until else max_date
+        t_from, t_to = (int(t) for t in clean.time(start, end))
+        for data_group in data_groups:
+            # The checkpoint is the last timestamp synced, so resume just after it.
+            position = checkpoint.get(station, data_group)
+            start = t_from if position is None else max(t_from, position + 1)
+            periods.append((station, data_group, start, t_to))
+    return periods
+
+
+async def sync(
+    client,
+    stations=None,
+    data_groups=("raw",),
+    store=None,
+    checkpoint=None,
+    format="normal",
+    since=None,
+    until=None,
+    chunk=timedelta(days=7),
+    concurrency=4,
+    rate=None,
+    progress_out=sys.stderr,
+):
+    """Sync data for stations into store, resuming from checkpoint.
+
+    Each station and data group is synced oldest chunk first, so the
+    checkpoint is always a safe place to resume from. A pair stops at
+    the first error response, without moving its checkpoint past it, and
+    the rest carry on. Up to `concurrency` station/group pairs are synced
+    at once, and requests are limited to `rate` per second. Returns the
+    final Progress stats."""
+    if stations is None:
+        stations = await client.get_user_stations()
+    stations = [clean.station(station) for station in stations]
+    data_groups = [clean.data_group(data_group) for data_group in data_groups]
+    chunk = int(chunk.total_seconds())
+
+    limiter = RateLimiter(rate)
+    periods = await plan(
+        client, stations, data_groups, checkpoint, since, until, concurrency, limiter
+    )
+    chunks = {period: list(chunk_period(*period[2:], chunk)) for period in periods}
+    progress = Progress(sum(map(len, chunks.values())), out=progress_out)
+    semaphore = anyio.Semaphore(concurrency)
+
+    async def sync_period(period):
+        station, data_group = period[:2]
+        async with semaphore:
+            for t_from, t_to in chunks[period]:
+                await limiter.wait()
+                try:
+                    with client.raise_for_status():
+                        data = await client.get_data(
+                            format, station, data_group, t_from, t_to
+                        )
+                except ResponseError as e:
+                    # A rerun fetches this chunk again, from the checkpoint.
+                    progress.fail(station, data_group, e)
+                    return
+                # Chunks without any data may come back empty.
+                if data is not None:
+                    store.write(station, data_group, t_from, t_to, data)
+                checkpoint.update(station, data_group, t_to)
+                progress.add(count_records(data))
+
+    async with anyio.create_task_group() as tg:
+        for period in periods:
+            tg.start_soon(sync_period, period)
+    progress.report(final=True)
+    return progress.stats()
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="fieldclimate",
+        description="Sync FieldClimate station data into a local directory.",
+    )
+    parser.add_argument(
+        "stations", nargs="*", help="station IDs to sync (default: all user stations)"
+    )
+    parser.add_argument(
+        "-g",
+        "--data-group",
+        action="append",
+        dest="data_groups",
+        help="raw, hourly, daily or monthly; may be repeated (default: raw)",
+    )
+    parser.add_argument("--store", default="fieldclimate-data", help="output directory")
+    parser.add_argument(
+        "--checkpoint",
+        help="checkpoint file (default: STORE/checkpoint.json)",
+    )
+    parser.add_argument("--format", default="normal", choices=["normal", "optimized"])
+    parser.add_argument("--since", type=parse_date, help="YYYY-MM-DD[ HH:MM:SS], UTC")
+    parser.add_argument("--until", type=parse_date, help="YYYY-MM-DD[ HH:MM:SS], UTC")
+    parser.add_argument(
+        "--chunk-days", type=float, default=7, help="days of data per request"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="station/groups synced at once"
+    )
+    parser.add_argument("--connections", type=int, help="HTTP connection pool size")
+    parser.add_argument("--rate", type=float, help="max requests per second")
+    parser.add_argument(
+        "--http2", action="store_true", help="multiplex requests over HTTP/2 (httpx)"
+    )
+    parser.add_argument("--record", metavar="CASSETTE", help="record traffic to file")
+    parser.add_argument(
+        "--replay", metavar="CASSETTE", help="replay recorded traffic, offline"
+    )
+    parser.add_argument("--public-key", help="default: $FIELDCLIMATE_PUBLIC_KEY")
+    parser.add_argument("--private-key", help="default: $FIELDCLIMATE_PRIVATE_KEY")
+    parser.add_argument("--backend", default="asyncio", choices=["asyncio", "trio"])
+    return parser
+
+
+async def run(args):
+    checkpoint_path = args.checkpoint or os.path.join(args.store, "checkpoint.json")
+    os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+    connections = args.connections or args.concurrency
+    transport = None
+    if args.http2:
+        # httpx is optional, so only import it when asked to.
+        from fieldclimate.http2 import HttpxTransport
+
+        transport = HttpxTransport(connections=connections)
+    keys = (args.public_key, args.private_key)
+    if args.replay:
+        transport = ReplayTransport(args.replay)
+        # Replayed requests are signed too, but the keys don't matter.
+        keys = (args.public_key or "replay", args.private_key or "replay")
+    client = FieldClimateClient(
+        public_key=keys[0],
+        private_key=keys[1],
+        transport=transport,
+        connections=connections,
+    )
+    if args.record:
+        client.record(args.record)
+    async with client:
+        await client.warm_up()
+        return await sync(
+            client,
+            stations=args.stations or None,
+            data_groups=args.data_groups or ["raw"],
+            store=Store(args.store),
+            checkpoint=Checkpoint(checkpoint_path),
+            format=args.format,
+            since=args.since,
+            until=args.until,
+            chunk=timedelta(days=args.chunk_days),
+            concurrency=args.concurrency,
+            rate=args.rate,
+        )
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    try:
+        stats = anyio.run(run, args, backend=args.backend)
+    except KeyboardInterrupt:
+        print("Interrupted; run again to resume from the checkpoint.", file=sys.stderr)
+        return 130
+    if stats["failed"]:
+        print("Some data failed; run again to retry it.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
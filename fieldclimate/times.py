@@ -0,0 +1,82 @@
+"""Convert whole columns of response dates at once, in a station's timezone.
+
+Data, event and history responses list dates as 'YYYY-MM-DD HH:MM:SS'
+strings in the station's local time. Rather than making a datetime for
+every row, these parse a whole column with numpy:
+
+    data = await client.get_data("normal", station, "hourly", t_from, t_to)
+    times = to_epoch(data["dates"], Station(station))  # int64 unix timestamps
+    times = to_datetime64(data["dates"], "Europe/Vienna")  # datetime64[s], UTC
+
+timezone may be None for UTC, a station's timezone_offset in minutes
+east of UTC, a models.Station, a tzinfo, or a timezone name like those
+listed by get_system_timezones(). Fixed offsets convert in one numpy
+operation. Zones with daylight saving time look up one offset per
+distinct hour in the data, not per row.
+
+Requires numpy: pip install python-fieldclimate[numpy]"""
+
+__all__ = ["local_seconds", "utc_offsets", "to_epoch", "to_datetime64"]
+
+from datetime import datetime, timedelta, tzinfo
+
+import numpy as np
+
+from fieldclimate import models
+
+HOUR = 3600
+
+
+def local_seconds(dates) -> np.ndarray:
+    """Parse date strings (or datetime64s) into int64 seconds, without a timezone."""
+    dates = np.asarray(dates)
+    if dates.size == 0:
+        return np.empty(dates.shape, dtype="int64")
+    return dates.astype("datetime64[s]").astype("int64")
+
+
+def resolve(timezone):
+    # Return a fixed offset in seconds, or a tzinfo to look offsets up in.
+    if isinstance(timezone, models.Station):
+        timezone = timezone.timezone_offset
+    if timezone is None:
+        return 0
+    if isinstance(timezone, str):
+        # zoneinfo is new in Python 3.9, so only import it when it's needed.
+        from zoneinfo import ZoneInfo
+
+        timezone = ZoneInfo(timezone)
+    if isinstance(timezone, tzinfo):
+        offset = timezone.utcoffset(None)
+        return int(offset.total_seconds()) if offset is not None else timezone
+    # Stations report timezone_offset in minutes.
+    return int(timezone) * 60
+
+
+def utc_offsets(seconds: np.ndarray, timezone):
+    """Return the UTC offset in seconds of each local time, or one offset for all."""
+    zone = resolve(timezone)
+    if not isinstance(zone, tzinfo):
+        return zone
+    # Offsets change on the hour, so look one up per distinct hour.
+    hours, index = np.unique(seconds // HOUR, return_inverse=True)
+    epoch = datetime(1970, 1, 1)
+    offsets = np.array(
+        [
+            zone.utcoffset(epoch + timedelta(hours=int(hour))).total_seconds()
+            for hour in hours
+        ],
+        dtype="int64",
+    )
+    return offsets[index.reshape(seconds.shape)]
+
+
+def to_epoch(dates, timezone=None) -> np.ndarray:
+    """Return local dates in timezone as an array of int64 unix timestamps."""
+    seconds = local_seconds(dates)
+    return seconds - utc_offsets(seconds, timezone)
+
+
+def to_datetime64(dates, timezone=None) -> np.ndarray:
+    """Return local dates in timezone as an array of UTC datetime64[s]."""
+    return to_epoch(dates, timezone).astype("datetime64[s]")
@@ -0,0 +1,144 @@
+"""Transports carry FieldClimateClient's signed requests to the API server.
+
+A transport has three coroutine methods:
+
+- ``request(method, url, data=None, headers=None)`` returns a Response.
+- ``warm_up(url, connections)`` opens connections ahead of a burst of requests.
+- ``close()`` releases any connections left open.
+
+A transport may also have a ``max_concurrency`` attribute, the number of
+requests it can have in flight at once. FieldClimateClient sizes its
+dispatcher from it, or from the session's connections if it's missing.
+
+AsksTransport is the default. See fieldclimate.http2 for an HTTP/2 transport."""
+
+__all__ = ["Response", "AsksTransport"]
+
+import json
+from time import monotonic
+from urllib.parse import urlparse, urlunparse
+
+import anyio
+from asks.req_structs import SocketQ
+
+from fieldclimate.compression import Decoder, accept_encoding
+
+
+class Response:
+    """The parts of an HTTP response that FieldClimateClient cares about.
+
+    content is always decompressed. wire_size counts the bytes of the body
+    as they were sent, before decompression."""
+
+    __slots__ = ("status_code", "headers", "content", "wire_size")
+
+    def __init__(self, status_code, headers, content, wire_size=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.wire_size = len(content) if wire_size is None else wire_size
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.status_code}>"
+
+    def json(self):
+        # This may raise json.JSONDecodeError if response is empty:
+        return json.loads(self.content)
+
+
+class IdleSocketQ(SocketQ):
+    """asks' connection pool, remembering when each socket was returned."""
+
+    def appendleft(self, sock):
+        sock.idle_since = monotonic()
+        super().appendleft(sock)
+
+    def pop_idle(self, expiry):
+        # Returned sockets are appended left, so the stalest are on the right.
+        expired = []
+        while self and monotonic() - self[-1].idle_since > expiry:
+            expired.append(self.pop())
+        return expired
+
+
+class BodyCollector:
+    """Collect the raw chunks of a body, then decode them with Decoder.
+
+    asks passes chunks to its callback without the response headers, so
+    the Content-Encoding is only known once the body is complete. Until
+    then, the compressed body is held in memory, so decoding briefly
+    needs room for both it and the decompressed body."""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    async def receive(self, chunk):
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+
+    def finish(self, content_encoding):
+        decoder = Decoder(content_encoding)
+        # Join the decoded chunks once, rather than copying the body as it grows.
+        decoded = [decoder.feed(chunk) for chunk in self.chunks]
+        decoded.append(decoder.finish())
+        self.chunks = []
+        return b"".join(decoded)
+
+
+class AsksTransport:
+    """Send requests through an asks.Session, usually the client itself.
+
+    asks asks servers to close connections after every response, unless
+    keep_alive is set. Kept-alive connections are closed once they sit idle
+    in the pool for keepalive_expiry seconds, before the server drops them."""
+
+    def __init__(self, session, keep_alive=True, keepalive_expiry=5.0):
+        self.session = session
+        # asks sends one request per connection at a time.
+        self.max_concurrency = session._connections
+        self.keep_alive = keep_alive
+        self.keepalive_expiry = keepalive_expiry
+        if keep_alive and keepalive_expiry is not None:
+            session._conn_pool = IdleSocketQ(session._conn_pool)
+
+    async def evict_idle(self):
+        pool = self.session._conn_pool
+        if isinstance(pool, IdleSocketQ):
+            for sock in pool.pop_idle(self.keepalive_expiry):
+                await sock.aclose()
+
+    async def request(self, method, url, data=None, headers=None):
+        headers = dict(headers or {})
+        headers.setdefault("Accept-Encoding", accept_encoding())
+        if self.keep_alive:
+            headers.setdefault("Connection", "keep-alive")
+        await self.evict_idle()
+        # asks only decodes gzip and deflate, so take the raw body and decode it here.
+        body = BodyCollector()
+        response = await self.session.request(
+            method, url, data=data, headers=headers, callback=body.receive
+        )
+        content = body.finish(response.headers.get("Content-Encoding"))
+        return Response(response.status_code, response.headers, content, body.size)
+
+    async def warm_up(self, url, connections):
+        # asks has no public api for this, so fill its pool like asks would.
+        if not self.keep_alive:
+            return
+        scheme, host, _, _, _, _ = urlparse(url)
+        host_loc = urlunparse((scheme, host, "", "", "", ""))
+        pool = self.session._conn_pool
+        missing = connections - sum(sock.host == host_loc for sock in pool)
+
+        async def connect():
+            sock = await self.session._make_connection(host_loc)
+            await self.session.return_to_pool(sock)
+
+        async with anyio.create_task_group() as tg:
+            for _ in range(missing):
+                tg.start_soon(connect)
+
+    async def close(self):
+        # The session frees its own pool when it is closed.
+        pass
@@ -25,12 +25,16 @@ setup(
         "Operating System :: OS Independent",
         "Programming Language :: Python",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.5",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3 :: Only",
     ],
-    install_requires=["asks", "pycryptodome"],
-    python_requires=">=3.6",
+    install_requires=["anyio>=3,<4", "asks>=3,<4", "pycryptodome"],
+    extras_require={
+        "compression": ["brotli", "zstandard"],
+        "http2": ["httpx[http2]"],
+        "numpy": ["numpy"],
+    },
+    entry_points={"console_scripts": ["fieldclimate = fieldclimate.sync:main"]},
+    python_requires=">=3.7",
     include_package_data=True,
 )
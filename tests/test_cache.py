@@ -0,0 +1,214 @@
+from time import time
+from unittest import TestCase
+
+import anyio
+
+from fieldclimate import FieldClimateClient
+from fieldclimate.cache import ExpiringCache, RevalidatingCache, request_key
+from fieldclimate.transport import Response
+from tests.utils import Clock, FakeTransport, async_test, count_requests, json_response
+
+
+class RecordingClient(FieldClimateClient):
+    def __init__(self, handler):
+        super().__init__("super", "secret", transport=FakeTransport(handler))
+        self.changes = []
+
+    def response_changed(self, path, data):
+        self.changes.append((path, data))
+
+
+class CacheTestCase(TestCase):
+    def test_lru(self):
+        cache = RevalidatingCache(max_entries=2)
+        for path in ["/a", "/b", "/a", "/c"]:
+            cache.update(path, json_response(path))
+        self.assertEqual(list(cache.entries), ["/a", "/c"])
+
+    def test_errors_are_not_cached(self):
+        cache = RevalidatingCache()
+        cache.update("/a", json_response({"message": "Not found"}, 404))
+        self.assertEqual(len(cache), 0)
+
+    @async_test
+    async def test_errors_keep_cached_entry(self):
+        responses = iter(
+            [
+                json_response({"id": 1}),
+                json_response({"message": "Server error"}, 500),
+                json_response({"id": 1}),
+            ]
+        )
+        client = RecordingClient(lambda *request: next(responses))
+        results = [await client.get_station("00000001") for _ in range(3)]
+        self.assertEqual(results[1], {"message": "Server error"})
+        self.assertIs(results[2], results[0])
+        self.assertEqual(client.changes, [("/station/00000001", {"id": 1})])
+        self.assertEqual((client.cache.hits, client.cache.misses), (1, 1))
+
+    @async_test
+    async def test_etag_revalidation(self):
+        def handler(method, url, data, headers):
+            if headers.get("If-None-Match") == '"v1"':
+                return Response(304, {}, b"")
+            return json_response({"name": "sensors"}, headers={"ETag": '"v1"'})
+
+        client = RecordingClient(handler)
+        first = await client.get_station_sensors("00000001")
+        second = await client.get_station_sensors("00000001")
+        self.assertEqual(first, {"name": "sensors"})
+        self.assertIs(second, first)
+        requests = client.transport.requests
+        self.assertNotIn("If-None-Match", requests[0][3])
+        self.assertEqual(requests[1][3]["If-None-Match"], '"v1"')
+        self.assertEqual(len(client.changes), 1)
+        self.assertEqual((client.cache.hits, client.cache.misses), (1, 1))
+
+    @async_test
+    async def test_entry_evicted_during_revalidation(self):
+        class SlowRevalidation(FakeTransport):
+            async def request(self, method, url, data=None, headers=None):
+                # Revalidations answer last, once other responses filled the cache.
+                if "If-None-Match" in headers:
+                    await anyio.sleep(0.05)
+                return await super().request(method, url, data, headers)
+
+        def handler(method, url, data, headers):
+            etag = f'"{url[-8:]}"'
+            if headers.get("If-None-Match") == etag:
+                return Response(304, {}, b"")
+            return json_response({"url": url}, headers={"ETag": etag})
+
+        transport = SlowRevalidation(handler)
+        client = FieldClimateClient(
+            "super", "secret", transport=transport, connections=4
+        )
+        client.cache = RevalidatingCache(2)
+        stations = [f"{i:08}" for i in range(4)]
+        first = [await client.get_station(station) for station in stations[:2]]
+        results = await client.map(client.get_station, stations)
+        self.assertIs(results[0], first[0])
+        self.assertIs(results[1], first[1])
+        self.assertEqual(client.cache.hits, 2)
+        self.assertEqual(len(client.cache), 2)
+
+    @async_test
+    async def test_last_modified_revalidation(self):
+        last_modified = "Mon, 23 Sep 2019 10:00:00 GMT"
+
+        def handler(method, url, data, headers):
+            headers = {"Last-Modified": last_modified}
+            return json_response({"forecast": "sunny"}, headers=headers)
+
+        client = RecordingClient(handler)
+        await client.get_forecast("00000001", "basic-1h")
+        await client.get_forecast("00000001", "basic-1h")
+        headers = client.transport.requests[1][3]
+        self.assertEqual(headers["If-Modified-Since"], last_modified)
+
+    @async_test
+    async def test_content_hash_fallback(self):
+        bodies = iter([{"id": 1}, {"id": 1}, {"id": 2}])
+        client = RecordingClient(lambda *request: json_response(next(bodies)))
+        results = [await client.get_station("00000001") for _ in range(3)]
+        self.assertIs(results[1], results[0])
+        self.assertEqual(results[2], {"id": 2})
+        self.assertEqual(
+            client.changes,
+            [("/station/00000001", {"id": 1}), ("/station/00000001", {"id": 2})],
+        )
+
+    @async_test
+    async def test_other_routes_are_not_cached(self):
+        client = RecordingClient(lambda *request: json_response({"ok": True}))
+        await client.get_user()
+        await client.get_data_range("00000001")
+        await client.put_station("00000001", {"name": "x"})
+        self.assertEqual(len(client.cache), 0)
+        self.assertEqual(client.changes, [])
+
+
+class ChartCacheTestCase(TestCase):
+    def test_expiry(self):
+        clock = Clock()
+        cache = ExpiringCache(clock=clock)
+        cache.set("short", 1, ttl=10)
+        cache.set("forever", 2)
+        clock.now = 9
+        self.assertEqual((cache.get("short"), cache.get("forever")), (1, 2))
+        clock.now = 10**9
+        self.assertEqual((cache.get("short"), cache.get("forever")), (None, 2))
+        self.assertEqual(len(cache), 1)
+
+    def test_lru(self):
+        cache = ExpiringCache(max_entries=2)
+        for key in ["a", "b", "a", "c"]:
+            cache.set(key, key)
+        self.assertEqual(list(cache.entries), ["a", "c"])
+
+    def test_request_key(self):
+        self.assertEqual(
+            request_key("POST", "/chart", {"a": 1, "b": [2]}),
+            request_key("POST", "/chart", {"b": [2], "a": 1}),
+        )
+        self.assertNotEqual(
+            request_key("POST", "/chart", {"a": 1}), request_key("POST", "/chart")
+        )
+
+    def test_chart_expiry(self):
+        client = FieldClimateClient("super", "secret")
+        now = int(time())
+        closed = (
+            f"/chart/images/00000001/raw/from/{now - 3 * 86400}/to/{now - 2 * 86400}"
+        )
+        still_open = f"/chart/images/00000001/raw/from/{now - 3600}/to/{now}"
+        self.assertIsNone(client.chart_expiry(closed))
+        self.assertEqual(client.chart_expiry(still_open), client.chart_ttl)
+        last = "/chart/highcharts/00000001/hourly/last/7d"
+        self.assertEqual(client.chart_expiry(last), client.chart_ttl)
+        self.assertEqual(client.chart_expiry("/data/00000001"), 0)
+
+    @async_test
+    async def test_charts_are_cached(self):
+        transport = FakeTransport(count_requests())
+        client = FieldClimateClient("super", "secret", transport=transport)
+        first = await client.get_chart_last("images", "00000001", "raw", "1d")
+        second = await client.get_chart_last("images", "00000001", "raw", "1d")
+        self.assertIs(second, first)
+        await client.post_chart_last("images", "00000001", "raw", "1d", {"a": 1})
+        await client.post_chart_last("images", "00000001", "raw", "1d", {"a": 1})
+        await client.post_chart_last("images", "00000001", "raw", "1d", {"a": 2})
+        self.assertEqual(len(transport.requests), 3)
+        # Once expired, charts of open periods are fetched again:
+        client.chart_cache.clock = lambda: 10**12
+        await client.get_chart_last("images", "00000001", "raw", "1d")
+        self.assertEqual(len(transport.requests), 4)
+
+    @async_test
+    async def test_chart_errors_are_not_cached(self):
+        transport = FakeTransport(lambda *request: json_response({}, status_code=500))
+        client = FieldClimateClient("super", "secret", transport=transport)
+        for _ in range(2):
+            await client.get_chart_last("images", "00000001", "raw", "1d")
+        self.assertEqual(len(transport.requests), 2)
+
+    @async_test
+    async def test_get_charts(self):
+        def handler(method, url, data, headers):
+            return json_response({"url": url})
+
+        transport = FakeTransport(handler)
+        client = FieldClimateClient("super", "secret", transport=transport)
+        charts = [
+            ("images", "00000001", "raw", "1d"),
+            ("images", "00000002", "daily", 1569196800, 1569283200),
+            # Identical charts wait for the first request instead of sending their own:
+            ("images", "00000001", "raw", "1d"),
+        ]
+        results = await client.get_charts(charts)
+        self.assertEqual(len(transport.requests), 2)
+        self.assertIs(results[2], results[0])
+        self.assertTrue(
+            results[0]["url"].endswith("/chart/images/00000001/raw/last/1d")
+        )
+        self.assertTrue(results[1]["url"].endswith("/from/1569196800/to/1569283200"))
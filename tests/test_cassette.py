@@ -0,0 +1,113 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import anyio
+
+from fieldclimate import FieldClimateClient
+from fieldclimate.cassette import ReplayTransport
+from tests.utils import FakeTransport, async_test, count_requests, trio_test
+
+
+class CassetteTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "test.cassette")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    async def record(self):
+        client = FieldClimateClient(
+            "super", "secret", transport=FakeTransport(count_requests())
+        )
+        client.record(self.path)
+        async with client:
+            await client.get_user()
+            await client.get_user()
+            await client.put_user({"info": {"name": "me"}})
+            await client.get_data_last("normal", "00000001", "raw", "1d")
+        return client
+
+    def replay_client(self, **kwargs):
+        transport = ReplayTransport(self.path, **kwargs)
+        return FieldClimateClient("other", "keys", transport=transport)
+
+    @async_test
+    async def test_replay(self):
+        await self.record()
+        async with self.replay_client() as client:
+            self.assertEqual(len(client.transport), 4)
+            self.assertEqual(await client.get_user(), {"count": 1})
+            self.assertEqual(await client.get_user(), {"count": 2})
+            # Ran out of recordings, so repeat the last one:
+            self.assertEqual(await client.get_user(), {"count": 2})
+            self.assertEqual(
+                await client.put_user({"info": {"name": "me"}}), {"count": 3}
+            )
+            data = await client.get_data_last("normal", "00000001", "raw", "1d")
+            self.assertEqual(data, {"count": 4})
+            self.assertEqual(client.transfer_stats.report()["/data"]["responses"], 1)
+
+    @trio_test
+    async def test_unrecorded_request(self):
+        await self.record()
+        async with self.replay_client() as client:
+            with self.assertRaises(LookupError):
+                await client.put_user({"info": {"name": "someone else"}})
+            with self.assertRaises(LookupError):
+                await client.get_user_stations()
+
+    @async_test
+    async def test_hmac_is_redacted(self):
+        await self.record()
+        with open(self.path, "rb") as f:
+            contents = f.read()
+        self.assertIn(b"REDACTED", contents)
+        self.assertNotIn(b"hmac super", contents)
+
+    @async_test
+    async def test_headers_replay(self):
+        await self.record()
+        transport = ReplayTransport(self.path)
+        response = await transport.request(
+            "GET", "https://api.fieldclimate.com/v1/user"
+        )
+        self.assertEqual(response.headers["etag"], '"1"')
+        await transport.close()
+
+    @async_test
+    async def test_latency(self):
+        await self.record()
+        async with self.replay_client(latency=lambda: 0.05) as client:
+            start = anyio.current_time()
+            await client.get_user()
+            self.assertGreaterEqual(anyio.current_time() - start, 0.05)
+
+    def test_not_a_cassette(self):
+        with open(self.path, "wb") as f:
+            f.write(b"{}" * 20)
+        with self.assertRaises(ValueError):
+            ReplayTransport(self.path)
+
+    @async_test
+    async def test_bodies_written_as_they_arrive(self):
+        client = FieldClimateClient(
+            "super", "secret", transport=FakeTransport(count_requests())
+        )
+        client.record(self.path)
+        async with client:
+            await client.get_user()
+            # The body is on disk already, and the index can be saved at any time:
+            client.transport.file.flush()
+            with open(self.path, "rb") as f:
+                self.assertIn(b'{"count": 1}', f.read())
+            client.transport.save()
+            transport = ReplayTransport(self.path)
+            self.assertEqual(len(transport), 1)
+            await transport.close()
+            await client.get_user()
+        async with self.replay_client() as client:
+            self.assertEqual(len(client.transport), 2)
+            self.assertEqual(await client.get_user(), {"count": 1})
+            self.assertEqual(await client.get_user(), {"count": 2})
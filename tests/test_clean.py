@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta, timezone
 from unittest import TestCase
 
+import numpy as np
+
 from fieldclimate import clean
 
 
@@ -18,6 +20,13 @@ class CleanTestCase(TestCase):
         self.assertEqual(c, "1538352000")
         self.assertEqual(d, "1538352000")
 
+    def test_clean_time_datetime64(self):
+        a, b = clean.time(
+            np.datetime64("2018-10-01T00:00:00.750"), np.datetime64("2018-10-01")
+        )
+        self.assertEqual(a, "1538352000")
+        self.assertEqual(b, "1538352000")
+
     def test_clean_data_group(self):
         self.assertEqual(clean.data_group("raw"), "raw")
         self.assertEqual(clean.data_group("hourly"), "hourly")
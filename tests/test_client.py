@@ -74,7 +74,7 @@ class ClientTestCase(TestCase):
         async with self.TestClient() as client:
             self.assertIn("slideshow", await client.httpbin_json())
 
-    @mock.patch("fieldclimate.datetime")
+    @mock.patch("fieldclimate.client.datetime")
     def test_hmac_headers(self, mock_datetime):
         mock_datetime.utcnow = mock.Mock(
             return_value=datetime(2018, 10, 22, 22, 22, 22, 222222)
@@ -0,0 +1,142 @@
+import gzip
+import json
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from unittest import TestCase, skipIf
+
+from fieldclimate import FieldClimateClient, compression
+from fieldclimate.compression import Decoder, TransferStats, accept_encoding
+from tests.utils import async_test, trio_test
+
+BODY = json.dumps({"dates": ["2019-09-23 10:00:00"] * 500}).encode()
+
+
+def compress(data, encoding):
+    if encoding == "gzip":
+        return gzip.compress(data)
+    if encoding == "deflate":
+        return zlib.compress(data)
+    if encoding == "br":
+        import brotli
+
+        return brotli.compress(data)
+    if encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+class CompressingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        encoding = self.headers["Accept-Encoding"].split(",")[0].strip()
+        self.server.accept_encoding = self.headers["Accept-Encoding"]
+        body = compress(BODY, encoding)
+        self.send_response(200)
+        self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def feed_in_chunks(decoder, data, size=7):
+    chunks = [decoder.feed(data[i : i + size]) for i in range(0, len(data), size)]
+    return b"".join(chunks) + decoder.finish()
+
+
+class CompressionTestCase(TestCase):
+    def test_gzip_and_deflate(self):
+        for encoding in ["gzip", "x-gzip", "deflate"]:
+            data = compress(BODY, "gzip" if encoding == "x-gzip" else encoding)
+            self.assertEqual(feed_in_chunks(Decoder(encoding), data), BODY)
+
+    def test_raw_deflate(self):
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        data = compressor.compress(BODY) + compressor.flush()
+        self.assertEqual(feed_in_chunks(Decoder("deflate"), data), BODY)
+
+    @skipIf("br" not in compression.available_decoders(), "brotli is not installed")
+    def test_brotli(self):
+        self.assertIn("br", accept_encoding())
+        data = compress(BODY, "br")
+        self.assertEqual(feed_in_chunks(Decoder("br"), data), BODY)
+
+    @skipIf(
+        "zstd" not in compression.available_decoders(), "zstandard is not installed"
+    )
+    def test_zstd(self):
+        self.assertTrue(accept_encoding().startswith("zstd"))
+        data = compress(BODY, "zstd") + compress(b"[]", "zstd")
+        self.assertEqual(feed_in_chunks(Decoder("zstd"), data), BODY + b"[]")
+
+    def test_stacked_encodings(self):
+        data = gzip.compress(zlib.compress(BODY))
+        decoder = Decoder("deflate, gzip")
+        self.assertEqual(feed_in_chunks(decoder, data), BODY)
+        self.assertEqual(decoder.compressed_size, len(data))
+        self.assertEqual(decoder.decompressed_size, len(BODY))
+
+    def test_identity(self):
+        self.assertEqual(feed_in_chunks(Decoder(None), BODY), BODY)
+        self.assertEqual(feed_in_chunks(Decoder("identity"), BODY), BODY)
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            Decoder("compress")
+
+    def test_transfer_stats(self):
+        stats = TransferStats()
+        stats.add("/data/normal/00000001/raw/last/1d", 100, 1000)
+        stats.add("/data/normal/00000002/raw/last/1d", 100, 600)
+        stats.add("/user", 10, 10)
+        report = stats.report()
+        self.assertEqual(
+            report["/data"],
+            {"responses": 2, "compressed": 200, "decompressed": 1600, "ratio": 8.0},
+        )
+        self.assertEqual(report["/user"]["ratio"], 1.0)
+
+
+class NegotiationTestCase(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), CompressingHandler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def client(self):
+        host, port = self.server.server_address
+        client_class = type(
+            "LocalClient",
+            (FieldClimateClient,),
+            {"base_location": f"http://{host}:{port}"},
+        )
+        return client_class(public_key="super", private_key="secret")
+
+    async def get_data_twice(self):
+        async with self.client() as client:
+            for _ in range(2):
+                data = await client.get_data_last("normal", "00000001", "raw", "1d")
+                self.assertEqual(data, json.loads(BODY))
+        return client
+
+    @async_test
+    async def test_negotiated_encoding(self):
+        client = await self.get_data_twice()
+        self.assertEqual(self.server.accept_encoding, accept_encoding())
+        report = client.transfer_stats.report()["/data"]
+        self.assertEqual(report["responses"], 2)
+        self.assertEqual(report["decompressed"], 2 * len(BODY))
+        self.assertLess(report["compressed"], report["decompressed"] / 10)
+
+    @trio_test
+    async def test_negotiated_encoding_trio(self):
+        await self.get_data_twice()
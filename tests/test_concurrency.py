@@ -0,0 +1,114 @@
+from unittest import TestCase
+
+import anyio
+
+from fieldclimate import FieldClimateClient
+from fieldclimate.concurrency import MapError, as_completed, map
+from tests.utils import FakeTransport, async_test, json_response, trio_test
+
+
+class Tracker:
+    """Records how many calls run at once, and which ones finish."""
+
+    def __init__(self, fail=()):
+        self.fail = fail
+        self.running = 0
+        self.peak = 0
+        self.finished = []
+
+    async def __call__(self, item):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            if item in self.fail:
+                raise ValueError(item)
+            # Later items finish first.
+            await anyio.sleep(0.005 * (10 - item))
+            self.finished.append(item)
+            return item * 2
+        finally:
+            self.running -= 1
+
+
+async def check_map(test):
+    tracker = Tracker()
+    test.assertEqual(await map(tracker, range(10), limit=3), [i * 2 for i in range(10)])
+    test.assertEqual(tracker.peak, 3)
+    test.assertEqual(await map(tracker, []), [])
+
+
+async def check_map_errors(test):
+    tracker = Tracker(fail=[5])
+    with test.assertRaises(MapError) as context:
+        await map(tracker, range(10), limit=2)
+    test.assertEqual([item for item, _ in context.exception.errors], [5])
+    test.assertIsInstance(context.exception.errors[0][1], ValueError)
+    # Calls still waiting were never started:
+    test.assertNotIn(9, tracker.finished)
+    test.assertEqual(tracker.running, 0)
+
+
+async def check_map_aggregates_errors(test):
+    tracker = Tracker(fail=[1, 2, 3])
+    with test.assertRaises(MapError) as context:
+        await map(tracker, [1, 2, 3])
+    test.assertEqual(sorted(item for item, _ in context.exception.errors), [1, 2, 3])
+
+
+async def check_as_completed(test):
+    async def wait(item):
+        await anyio.sleep(item * 0.02)
+        return -item
+
+    async with as_completed(wait, [3, 1, 2]) as results:
+        pairs = [pair async for pair in results]
+    test.assertEqual(pairs, [(1, -1), (2, -2), (3, -3)])
+
+
+async def check_as_completed_break(test):
+    tracker = Tracker()
+    async with as_completed(tracker, range(10), limit=2) as results:
+        async for item, result in results:
+            break
+    test.assertEqual(tracker.running, 0)
+    test.assertLess(len(tracker.finished), 10)
+
+
+async def check_cancelled_from_outside(test):
+    tracker = Tracker()
+    with anyio.move_on_after(0.01):
+        await map(tracker, range(10), limit=10)
+    test.assertEqual(tracker.running, 0)
+
+
+checks = [
+    check_map,
+    check_map_errors,
+    check_map_aggregates_errors,
+    check_as_completed,
+    check_as_completed_break,
+    check_cancelled_from_outside,
+]
+
+
+class ConcurrencyTestCase(TestCase):
+    @async_test
+    async def test_asyncio(self):
+        for check in checks:
+            with self.subTest(check.__name__):
+                await check(self)
+
+    @trio_test
+    async def test_trio(self):
+        for check in checks:
+            with self.subTest(check.__name__):
+                await check(self)
+
+    @async_test
+    async def test_client_map(self):
+        transport = FakeTransport(lambda m, url, *_: json_response(url[-8:]))
+        client = FieldClimateClient("super", "secret", transport=transport)
+        stations = [f"0000000{i}" for i in range(5)]
+        self.assertEqual(await client.map(client.get_data_range, stations), stations)
+        async with client.as_completed(client.get_data_range, stations) as results:
+            self.assertEqual(sorted([result async for _, result in results]), stations)
@@ -0,0 +1,107 @@
+from unittest import TestCase
+
+import anyio
+
+from fieldclimate import FieldClimateClient
+from fieldclimate.dispatch import BULK, INTERACTIVE, NORMAL, Dispatcher
+from tests.utils import FakeTransport, async_test, json_response, trio_test
+
+
+async def queue_up(dispatcher, order, tg, requests):
+    # Start each (name, priority, caller) request, waiting until it's queued.
+    for name, priority, caller in requests:
+
+        async def request(name=name, priority=priority, caller=caller):
+            async with dispatcher.slot(priority, caller):
+                order.append(name)
+
+        waiting = dispatcher.waiting()
+        tg.start_soon(request)
+        while dispatcher.waiting() == waiting:
+            await anyio.sleep(0)
+
+
+class DispatchTestCase(TestCase):
+    @async_test
+    async def test_priority_order(self):
+        dispatcher, order = Dispatcher(1), []
+        async with anyio.create_task_group() as tg:
+            async with dispatcher.slot(NORMAL):
+                await queue_up(
+                    dispatcher,
+                    order,
+                    tg,
+                    [
+                        ("bulk", BULK, None),
+                        ("normal", NORMAL, None),
+                        ("interactive", INTERACTIVE, None),
+                    ],
+                )
+        self.assertEqual(order, ["interactive", "normal", "bulk"])
+
+    @trio_test
+    async def test_callers_take_turns(self):
+        dispatcher, order = Dispatcher(1), []
+        async with anyio.create_task_group() as tg:
+            async with dispatcher.slot(BULK):
+                await queue_up(
+                    dispatcher,
+                    order,
+                    tg,
+                    [
+                        ("a1", BULK, "a"),
+                        ("a2", BULK, "a"),
+                        ("a3", BULK, "a"),
+                        ("b1", BULK, "b"),
+                    ],
+                )
+        self.assertEqual(order, ["a1", "b1", "a2", "a3"])
+
+    @async_test
+    async def test_bulk_share(self):
+        dispatcher = Dispatcher(4, bulk_share=0.5)
+        peak = {BULK: 0, NORMAL: 0}
+        running = {BULK: 0, NORMAL: 0}
+
+        async def request(priority):
+            async with dispatcher.slot(priority):
+                running[priority] += 1
+                peak[priority] = max(peak[priority], running[priority])
+                await anyio.sleep(0.01)
+                running[priority] -= 1
+
+        async with anyio.create_task_group() as tg:
+            for _ in range(10):
+                tg.start_soon(request, BULK)
+            await anyio.sleep(0.001)
+            for _ in range(4):
+                tg.start_soon(request, NORMAL)
+        self.assertEqual(peak[BULK], 2)
+        self.assertEqual(peak[NORMAL], 2)
+        self.assertEqual(dispatcher.active, 0)
+
+    @async_test
+    async def test_cancelled_waiter(self):
+        dispatcher = Dispatcher(1)
+        async with dispatcher.slot():
+            with anyio.move_on_after(0.01):
+                async with dispatcher.slot():
+                    pass
+            self.assertEqual(dispatcher.waiting(), 0)
+        self.assertEqual(dispatcher.active, 0)
+
+    @async_test
+    async def test_client_priority(self):
+        seen = []
+
+        def handler(method, url, data, headers):
+            seen.append(client.dispatcher.active_bulk)
+            return json_response({})
+
+        client = FieldClimateClient(
+            public_key="super", private_key="secret", transport=FakeTransport(handler)
+        )
+        with client.priority(BULK, caller="backfill"):
+            await client.get_user()
+        await client.get_user()
+        self.assertEqual(seen, [1, 0])
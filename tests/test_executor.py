@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+from time import monotonic
+from unittest import TestCase
+
+from fieldclimate import FieldClimateClient
+from fieldclimate.concurrency import MapError
+from fieldclimate.executor import SharedTokenBucket, ShardedExecutor
+from tests.utils import FakeTransport, async_test, json_response
+
+
+class WorkerClient(FieldClimateClient):
+    """Answers get_data_range() with the station and worker's process id."""
+
+    def __init__(self, **kwargs):
+        def handler(method, url, data, headers):
+            return json_response({"station": url[-8:], "pid": os.getpid()})
+
+        super().__init__("super", "secret", transport=FakeTransport(handler), **kwargs)
+
+
+async def get_range(client, station):
+    if station == "FAILURE!":
+        raise ValueError(station)
+    return await client.get_data_range(station)
+
+
+def take_tokens(bucket, count, times):
+    for _ in range(count):
+        times.append(monotonic() + bucket.reserve())
+
+
+class ExecutorTestCase(TestCase):
+    stations = [f"{i:08}" for i in range(12)]
+
+    def test_token_bucket(self):
+        bucket = SharedTokenBucket(rate=100, burst=2)
+        delays = [bucket.reserve() for _ in range(4)]
+        self.assertEqual(delays[:2], [0, 0])
+        self.assertAlmostEqual(delays[2], 0.01, delta=0.002)
+        self.assertAlmostEqual(delays[3], 0.02, delta=0.002)
+
+    def test_token_bucket_is_shared(self):
+        context = multiprocessing.get_context("spawn")
+        bucket = SharedTokenBucket(rate=50, context=context)
+        times = context.Manager().list()
+        processes = [
+            context.Process(target=take_tokens, args=(bucket, 5, times))
+            for _ in range(2)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        # 10 tokens at 50 per second, so the last is due 9 intervals after the first.
+        times = sorted(times)
+        self.assertGreaterEqual(times[-1] - times[0], 9 / 50 - 0.01)
+
+    def test_map(self):
+        executor = ShardedExecutor(
+            get_range, processes=3, rate=200, buffer=2, client_class=WorkerClient
+        )
+        results = dict(executor.map(self.stations))
+        self.assertEqual(sorted(results), self.stations)
+        for station, result in results.items():
+            self.assertEqual(result["station"], station)
+        self.assertEqual(len({result["pid"] for result in results.values()}), 3)
+
+    def test_map_errors(self):
+        executor = ShardedExecutor(get_range, processes=2, client_class=WorkerClient)
+        results = []
+        with self.assertRaises(MapError) as context:
+            for station, result in executor.map(["FAILURE!", *self.stations]):
+                results.append(station)
+        self.assertEqual(sorted(results), self.stations)
+        [(station, error)] = context.exception.errors
+        self.assertEqual(station, "FAILURE!")
+        self.assertIsInstance(error, ValueError)
+
+    @async_test
+    async def test_token_bucket_acquire(self):
+        bucket = SharedTokenBucket(rate=100)
+        start = monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        self.assertGreaterEqual(monotonic() - start, 0.015)
+
+    @async_test
+    async def test_client_limiter(self):
+        transport = FakeTransport(lambda *request: json_response({"ok": True}))
+        client = FieldClimateClient("me", "secret", transport=transport)
+
+        class Limiter:
+            def __init__(self):
+                self.active = []
+
+            async def acquire(self):
+                # Tokens are waited for before taking a connection.
+                self.active.append(client.dispatcher.active)
+
+        client.limiter = Limiter()
+        async with client:
+            await client.map(lambda _: client.get_user(), range(3))
+        self.assertEqual(client.limiter.active, [0, 0, 0])
+        self.assertEqual(len(transport.requests), 3)
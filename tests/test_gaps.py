@@ -0,0 +1,179 @@
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+import numpy as np
+
+from fieldclimate import FieldClimateClient, gaps
+from tests.utils import FakeTransport, async_test, json_response
+
+HOUR = 3600
+START = int(datetime(2019, 9, 1, tzinfo=timezone.utc).timestamp())
+
+
+def hourly_dates(hours):
+    return [
+        datetime.fromtimestamp(START + h * HOUR, timezone.utc).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+        for h in hours
+    ]
+
+
+def station_server(hours):
+    # Serves hourly data for the given hours.
+    def handler(method, url, data, headers):
+        t_from, t_to = (int(part) for part in url.split("/")[-3::2])
+        dates = [
+            d
+            for d, h in zip(hourly_dates(hours), hours)
+            if t_from <= START + h * HOUR <= t_to
+        ]
+        return json_response({"dates": dates, "data": []})
+
+    return handler
+
+
+def history_server(hours, last_communication):
+    handler = station_server(hours)
+
+    def with_history(method, url, data, headers):
+        if "/history/" in url:
+            [date] = hourly_dates([last_communication])
+            return json_response([{"date": date, "status": "success"}])
+        return handler(method, url, data, headers)
+
+    return with_history
+
+
+class GapsTestCase(TestCase):
+    def test_timestamps(self):
+        times = gaps.timestamps(["2019-09-01 01:00:00", "2019-09-01 00:00:00"] * 2)
+        self.assertEqual(times.tolist(), [START, START + HOUR])
+        self.assertEqual(gaps.timestamps([]).tolist(), [])
+        self.assertEqual(gaps.timestamps([5, 3]).tolist(), [3, 5])
+
+    def test_infer_cadence(self):
+        times = np.array([0, 600, 1200, 1800, 5400, 6000])
+        self.assertEqual(gaps.infer_cadence(times), 600)
+        self.assertEqual(gaps.infer_cadence(np.array([0])), 900)
+
+    def test_find_gaps(self):
+        times = START + np.array([2, 3, 4, 7, 8]) * HOUR
+        found = gaps.find_gaps(times, START, START + 10 * HOUR, HOUR)
+        expected = [[0, 1], [5, 6], [9, 10]]
+        self.assertEqual(((found - START) // HOUR).tolist(), expected)
+
+    def test_find_gaps_complete(self):
+        times = START + np.arange(11) * HOUR
+        self.assertEqual(len(gaps.find_gaps(times, START, START + 10 * HOUR, HOUR)), 0)
+        # Small jitter in the timestamps isn't a gap:
+        times[5] += 60
+        self.assertEqual(len(gaps.find_gaps(times, START, START + 10 * HOUR, HOUR)), 0)
+
+    def test_find_gaps_empty(self):
+        found = gaps.find_gaps(np.empty(0, "int64"), START, START + HOUR, HOUR)
+        self.assertEqual(found.tolist(), [[START, START + HOUR]])
+
+    def test_merge_gaps(self):
+        found = np.array([[0, 10], [20, 30], [100, 110]])
+        self.assertEqual(gaps.merge_gaps(found).tolist(), found.tolist())
+        self.assertEqual(gaps.merge_gaps(found, 10).tolist(), [[0, 30], [100, 110]])
+        self.assertEqual(gaps.merge_gaps(found, 100).tolist(), [[0, 110]])
+
+    @async_test
+    async def test_check_and_refetch(self):
+        have = [0, 1, 2, 5, 6, 9, 10]
+        transport = FakeTransport(station_server(range(11)))
+        client = FieldClimateClient("super", "secret", transport=transport)
+        data = {"dates": hourly_dates(have)}
+        report = await gaps.check(
+            client, "00000001", "hourly", START, START + 10 * HOUR, data, history=False
+        )
+        self.assertEqual(report.expected, 11)
+        self.assertEqual(report.received, 7)
+        self.assertEqual(report.missing, 4)
+        self.assertAlmostEqual(report.ratio, 7 / 11)
+        self.assertEqual(
+            report.to_dict()["gaps"],
+            [
+                [START + 3 * HOUR, START + 4 * HOUR],
+                [START + 7 * HOUR, START + 8 * HOUR],
+            ],
+        )
+        self.assertEqual(transport.requests, [])
+
+        refetched = await gaps.refetch(client, report)
+        self.assertEqual(len(transport.requests), 2)
+        self.assertEqual([len(data["dates"]) for _, data in refetched], [2, 2])
+        self.assertTrue(
+            transport.requests[0][1].endswith(
+                f"/from/{START + 3 * HOUR}/to/{START + 4 * HOUR}"
+            )
+        )
+
+    @async_test
+    async def test_refetch_joins_and_chunks(self):
+        transport = FakeTransport(station_server(range(100)))
+        client = FieldClimateClient("super", "secret", transport=transport)
+        report = await gaps.check(
+            client,
+            "00000001",
+            "hourly",
+            START,
+            START + 99 * HOUR,
+            {"dates": hourly_dates([2, 5])},
+            history=False,
+        )
+        periods = [
+            period
+            for period, _ in await gaps.refetch(
+                client, report, join=2 * HOUR, chunk=timedelta(hours=24)
+            )
+        ]
+        self.assertEqual(periods[0], (START, START + 24 * HOUR - 1))
+        self.assertEqual(periods[-1][1], START + 99 * HOUR)
+        self.assertEqual(len(periods), 5)
+
+    def test_month_starts(self):
+        t_from = int(datetime(2019, 1, 15, tzinfo=timezone.utc).timestamp())
+        t_to = int(datetime(2019, 4, 1, tzinfo=timezone.utc).timestamp())
+        starts = gaps.month_starts(t_from, t_to).astype("datetime64[s]")
+        self.assertEqual(
+            [str(s) for s in starts],
+            ["2019-02-01T00:00:00", "2019-03-01T00:00:00", "2019-04-01T00:00:00"],
+        )
+        # Midnight on the first, an hour east of UTC:
+        starts = gaps.month_starts(t_from, t_to, 60).astype("datetime64[s]")
+        self.assertEqual(str(starts[0]), "2019-01-31T23:00:00")
+
+    @async_test
+    async def test_monthly(self):
+        client = FieldClimateClient("super", "secret", transport=FakeTransport(None))
+        dates = ["2019-01-01", "2019-02-01", "2019-05-01", "2019-06-01"]
+        t_from, t_to = (
+            datetime(2019, 1, 1, tzinfo=timezone.utc),
+            datetime(2019, 6, 1, tzinfo=timezone.utc),
+        )
+        report = await gaps.check(
+            client, "00000001", "monthly", t_from, t_to, {"dates": dates}, history=False
+        )
+        self.assertEqual((report.expected, report.received, report.missing), (6, 4, 2))
+        march, april = (
+            int(datetime(2019, month, 1, tzinfo=timezone.utc).timestamp())
+            for month in (3, 4)
+        )
+        self.assertEqual(report.gaps.tolist(), [[march, april]])
+        self.assertIsNone(report.cadence)
+
+    @async_test
+    async def test_check_history(self):
+        # The station last got through at hour 6, so later records aren't missing yet.
+        transport = FakeTransport(history_server(range(6), last_communication=6))
+        client = FieldClimateClient("super", "secret", transport=transport)
+        report = await gaps.check(
+            client, "00000001", "hourly", START, START + 10 * HOUR
+        )
+        self.assertEqual(report.t_to, START + 6 * HOUR)
+        self.assertEqual(report.received, 6)
+        self.assertEqual(report.gaps.tolist(), [[START + 6 * HOUR, START + 6 * HOUR]])
+        self.assertIn("/history/success/", transport.requests[1][1])
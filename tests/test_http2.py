@@ -0,0 +1,74 @@
+from urllib.parse import parse_qs
+from unittest import TestCase
+
+import anyio
+import httpx
+
+from fieldclimate import FieldClimateClient
+from fieldclimate.http2 import HttpxTransport
+from tests.utils import async_test, trio_test
+
+
+def echo(request):
+    return httpx.Response(
+        200,
+        json={
+            "method": request.method,
+            "url": str(request.url),
+            "authorization": request.headers["authorization"],
+            "form": parse_qs(request.content.decode()),
+        },
+    )
+
+
+class HttpxTestCase(TestCase):
+    def client(self):
+        transport = HttpxTransport(transport=httpx.MockTransport(echo))
+        return FieldClimateClient(
+            public_key="super", private_key="secret", transport=transport
+        )
+
+    @async_test
+    async def test_httpx_get(self):
+        async with self.client() as client:
+            result = await client.get_user()
+        self.assertEqual(result["method"], "GET")
+        self.assertEqual(result["url"], "https://api.fieldclimate.com/v1/user")
+        self.assertTrue(result["authorization"].startswith("hmac super:"))
+
+    @trio_test
+    async def test_httpx_form_data(self):
+        async with self.client() as client:
+            result = await client.put_user({"info": "name"})
+        self.assertEqual(result["method"], "PUT")
+        self.assertEqual(result["form"], {"info": ["name"]})
+
+    @async_test
+    async def test_requests_multiplexed(self):
+        # Two connections carry many requests at once over HTTP/2.
+        in_flight = peak = 0
+
+        async def slow(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await anyio.sleep(0.05)
+            in_flight -= 1
+            return httpx.Response(200, json={})
+
+        transport = HttpxTransport(connections=2, transport=httpx.MockTransport(slow))
+        client = FieldClimateClient("super", "secret", transport=transport)
+        self.assertEqual(client.dispatcher.slots, 200)
+        async with client:
+            await client.map(client.get_data_range, [f"{i:08}" for i in range(20)])
+        self.assertEqual(peak, 20)
+
+    def test_http1_concurrency(self):
+        transport = HttpxTransport(connections=3, http2=False)
+        self.assertEqual(transport.max_concurrency, 3)
+
+    @async_test
+    async def test_httpx_close(self):
+        client = self.client()
+        await client.close()
+        self.assertTrue(client.transport.client.is_closed)
@@ -0,0 +1,56 @@
+import json
+import subprocess
+import sys
+from unittest import TestCase
+
+HEAVY_MODULES = ["anyio", "asks", "Crypto", "h11", "brotli", "zstandard"]
+
+
+def run_python(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return result.stdout, result.stderr
+
+
+def import_time(stderr, module):
+    # -X importtime reports 'import time: self [us] | cumulative | module'
+    for line in stderr.splitlines():
+        self_us, cumulative_us, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative_us)
+    raise AssertionError(f"{module} was not imported")
+
+
+class ImportTimeTestCase(TestCase):
+    def loaded_heavy_modules(self, code):
+        check = (
+            "import json, sys; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES} if m in sys.modules]))"
+        )
+        stdout, stderr = run_python(f"{code}; {check}")
+        return json.loads(stdout), stderr
+
+    def test_import_is_light(self):
+        loaded, _ = self.loaded_heavy_modules("import fieldclimate, fieldclimate.clean")
+        self.assertEqual(loaded, [])
+
+    def test_client_defers_crypto(self):
+        loaded, _ = self.loaded_heavy_modules(
+            "from fieldclimate import FieldClimateClient"
+        )
+        self.assertNotIn("Crypto", loaded)
+        self.assertNotIn("brotli", loaded)
+        self.assertNotIn("zstandard", loaded)
+        self.assertIn("asks", loaded)
+
+    def test_import_time_benchmark(self):
+        _, light = run_python("import fieldclimate.clean")
+        _, full = run_python("import fieldclimate.client")
+        light_us = import_time(light, "fieldclimate.clean")
+        full_us = import_time(full, "fieldclimate.client")
+        message = f"fieldclimate.clean: {light_us}us, fieldclimate.client: {full_us}us"
+        self.assertLess(light_us, full_us, message)
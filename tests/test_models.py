@@ -0,0 +1,123 @@
+import gc
+import json
+import math
+import tracemalloc
+from datetime import datetime, timezone
+from unittest import TestCase
+
+from fieldclimate import clean
+from fieldclimate.models import DataSeries, Node, Sensor, Station
+
+
+def raw_station(i):
+    return {
+        "name": {"original": f"{i:08X}", "custom": f"Station {i}"},
+        "info": {"device_id": 7, "firmware": "V16.18.6", "uid": str(i) * 3},
+        "config": {"timezone_offset": 60, "upload": {"transfer_interval": 15}},
+        "position": {"geo": {"coordinates": [15.44, 47.07]}, "altitude": 350},
+        "dates": {
+            "min_date": "2018-01-01 00:00:00",
+            "max_date": "2019-09-23 10:00:00",
+            "last_communication": "2019-09-23 10:05:00",
+            "created_at": "2017-12-31 09:00:00",
+        },
+        "meta": {"time": 1569233100, "rh": 81, "airTemp": 12.5, "battery": 6400},
+        "licenses": {"models": ["GeneralAphid"], "Forecast": True},
+        "networking": {"mnc": "01", "mcc": "232", "apn": "internet", "imei": str(i)},
+    }
+
+
+def raw_sensor(i):
+    return {
+        "name": "HC Air temperature",
+        "name_custom": None,
+        "color": "#ff0000",
+        "decimals": 1,
+        "unit": "°C",
+        "ch": i,
+        "code": 506,
+        "group": 1,
+        "mac": "X",
+        "serial": f"{i:08X}",
+        "aggr": {"avg": 1, "max": 1, "min": 1},
+        "registered": "2018-01-01 00:00:00",
+        "isActive": True,
+    }
+
+
+def memory_of(build):
+    # Bytes still allocated by the objects build() returns.
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+
+class ModelsTestCase(TestCase):
+    def test_station(self):
+        station = Station(raw_station(1))
+        self.assertEqual(station.id, "00000001")
+        self.assertEqual(station.name, "Station 1")
+        self.assertEqual((station.latitude, station.longitude), (47.07, 15.44))
+        self.assertEqual(station.timezone_offset, 60)
+        self.assertEqual(
+            station.last_communication,
+            datetime(2019, 9, 23, 10, 5, tzinfo=timezone.utc),
+        )
+        self.assertFalse(hasattr(station, "__dict__"))
+
+    def test_missing_fields(self):
+        station = Station({"name": {"original": "00000001"}})
+        self.assertIsNone(station.altitude)
+        self.assertIsNone(station.max_date)
+        self.assertEqual(
+            Node({}).to_dict(), {"serial": None, "name": None, "type": None}
+        )
+
+    def test_sensor_strings_are_shared(self):
+        a, b = (Sensor(json.loads(json.dumps(raw_sensor(i)))) for i in range(2))
+        self.assertIs(a.unit, b.unit)
+        self.assertIs(a.name, b.name)
+        self.assertTrue(a.is_active)
+
+    def test_data_series(self):
+        response = {
+            "dates": ["2019-09-23 09:00:00", "2019-09-23 10:00:00"],
+            "data": [
+                {"name": "Precipitation", "unit": "mm", "values": {"sum": [0.2, None]}},
+                {"name": "HC Air temperature", "values": {"avg": [12.5, 13.0]}},
+            ],
+        }
+        rain, temperature = DataSeries.from_response(response)
+        self.assertIs(rain.dates, temperature.dates)
+        self.assertEqual(rain.values["sum"][0], 0.2)
+        self.assertTrue(math.isnan(rain.values["sum"][1]))
+        self.assertEqual(list(temperature.values["avg"]), [12.5, 13.0])
+        self.assertEqual(
+            rain.parsed_dates()[1], datetime(2019, 9, 23, 10, tzinfo=timezone.utc)
+        )
+
+    def test_clean_station_model(self):
+        self.assertEqual(clean.station(Station(raw_station(1))), "00000001")
+
+    def test_station_memory_benchmark(self):
+        payload = json.dumps([raw_station(i) for i in range(2000)])
+        raw_size, _ = memory_of(lambda: json.loads(payload))
+        model_size, _ = memory_of(lambda: [Station(s) for s in json.loads(payload)])
+        message = f"2000 stations: {raw_size} bytes as dicts, {model_size} as models"
+        self.assertLess(model_size, raw_size / 4, message)
+
+    def test_data_memory_benchmark(self):
+        values = [{"avg": [12.5] * 2000, "max": [13.5] * 2000} for _ in range(20)]
+        response = {
+            "dates": ["2019-09-23 10:00:00"] * 2000,
+            "data": [{"name": "HC Air temperature", "values": v} for v in values],
+        }
+        payload = json.dumps(response)
+        raw_size, _ = memory_of(lambda: json.loads(payload))
+        model_size, _ = memory_of(lambda: DataSeries.from_response(json.loads(payload)))
+        message = f"80000 values: {raw_size} bytes as dicts, {model_size} as models"
+        self.assertLess(model_size, raw_size / 2, message)
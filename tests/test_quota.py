@@ -0,0 +1,100 @@
+import json
+import os
+from datetime import datetime, timezone
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from fieldclimate import FieldClimateClient, dispatch
+from fieldclimate.quota import QuotaTracker
+from tests.utils import Clock, FakeTransport, async_test, json_response
+
+# Noon, so half the day is left.
+NOON = datetime(2019, 9, 23, 12, tzinfo=timezone.utc).timestamp()
+
+
+class QuotaTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "quota.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_counts(self):
+        quota = QuotaTracker(limits={"*": 100, "/data": 10}, clock=Clock(NOON))
+        quota.add("me", "/data/00000001", 1000)
+        quota.add("me", "/data/00000002", 500)
+        quota.add("me", "/station/00000001", 10)
+        quota.add("someone else", "/user", 10)
+        self.assertEqual(
+            quota.usage("me"),
+            {
+                "/data": {"requests": 2, "bytes": 1500},
+                "/station": {"requests": 1, "bytes": 10},
+            },
+        )
+        self.assertEqual(quota.remaining("me", "/data/00000003"), 8)
+        self.assertEqual(quota.remaining("me", "/user"), 97)
+        self.assertEqual(quota.usage("me", "2019-09-22"), {})
+
+    def test_days(self):
+        clock = Clock(NOON)
+        quota = QuotaTracker(limits={"*": 10}, keep_days=2, clock=clock)
+        quota.add("me", "/user", 1)
+        clock.now += 86400
+        self.assertEqual(quota.remaining("me", "/user"), 10)
+        quota.add("me", "/user", 1)
+        clock.now += 2 * 86400
+        quota.add("me", "/user", 1)
+        self.assertEqual(sorted(quota.days), ["2019-09-24", "2019-09-26"])
+
+    def test_persistence(self):
+        clock = Clock(NOON)
+        quota = QuotaTracker(self.path, save_interval=60, clock=clock)
+        quota.add("me", "/user", 1)
+        self.assertFalse(os.path.exists(self.path))
+        clock.now += 60
+        quota.add("me", "/user", 1)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {"2019-09-23": {"me": {"/user": [2, 2]}}})
+        quota = QuotaTracker(self.path, clock=clock)
+        self.assertEqual(quota.usage("me"), {"/user": {"requests": 2, "bytes": 2}})
+
+    def test_bulk_pacing(self):
+        quota = QuotaTracker(
+            limits={"*": 1000, "/data": 110}, reserve=0.1, clock=Clock(NOON)
+        )
+        for _ in range(9):
+            quota.add("me", "/data/00000001", 1)
+        # 90 bulk requests are left for the 12 hours left today.
+        turns = [quota.reserve_turn("me", "/data/00000001", NOON) for _ in range(3)]
+        interval = 12 * 3600 / 90
+        self.assertEqual(turns[0], NOON)
+        self.assertAlmostEqual(turns[1] - turns[0], interval, delta=1)
+        self.assertAlmostEqual(turns[2] - turns[1], interval, delta=1)
+
+    def test_bulk_budget_spent(self):
+        quota = QuotaTracker(limits={"/data": 10}, reserve=0.5, clock=Clock(NOON))
+        for _ in range(5):
+            quota.add("me", "/data/00000001", 1)
+        self.assertIsNone(quota.reserve_turn("me", "/data/00000001", NOON))
+        # Other endpoints, and the reserve, are still available:
+        self.assertEqual(quota.reserve_turn("me", "/user", NOON), NOON)
+        self.assertEqual(quota.remaining("me", "/data/00000001"), 5)
+
+    @async_test
+    async def test_client(self):
+        quota = QuotaTracker(self.path, limits={"*": 10**6})
+        transport = FakeTransport(lambda *request: json_response({"ok": True}))
+        client = FieldClimateClient("me", "secret", transport=transport, quota=quota)
+        async with client:
+            await client.get_user()
+            with client.priority(dispatch.BULK):
+                await client.get_data_range("00000001")
+                # A million a day is plenty, so the second doesn't wait long:
+                await client.get_data_range("00000001")
+        usage = quota.usage("me")
+        self.assertEqual(usage["/user"]["requests"], 1)
+        self.assertEqual(usage["/data"], {"requests": 2, "bytes": 24})
+        # Closing the client saved the counts:
+        self.assertTrue(os.path.exists(self.path))
@@ -0,0 +1,210 @@
+import os
+from datetime import timedelta
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from fieldclimate import FieldClimateClient
+from fieldclimate.client import ResponseError
+from fieldclimate.stream import LogStream, SeenSet
+from fieldclimate.sync import Checkpoint
+from fieldclimate.transport import Response
+from tests.utils import Clock, FakeTransport, async_test, json_response
+
+NOW = 1569240000
+HOUR = 3600
+
+
+class LogServer:
+    """Serves a list of events with times, answering with those inside each period."""
+
+    def __init__(self, times):
+        self.events = [{"_id": f"e{t}", "time": t} for t in times]
+
+    def __call__(self, method, url, data, headers):
+        parts = url.split("/")
+        t_from, t_to = int(parts[-4]), int(parts[-2])
+        events = [e for e in self.events if t_from <= e["time"] <= t_to]
+        return json_response(events)
+
+
+def make_stream(server, **kwargs):
+    transport = FakeTransport(server)
+    client = FieldClimateClient("super", "secret", transport=transport)
+    return LogStream(client, **kwargs), transport
+
+
+class StreamTestCase(TestCase):
+    def test_seen_set(self):
+        seen = SeenSet(max_size=2)
+        self.assertTrue(seen.add("a"))
+        self.assertFalse(seen.add("a"))
+        seen.add("b")
+        seen.add("c")
+        self.assertNotIn("a", seen)
+        self.assertEqual(len(seen), 2)
+
+    @async_test
+    async def test_chunks(self):
+        server = LogServer([NOW - 30 * HOUR, NOW - 20 * HOUR, NOW - HOUR])
+        stream, transport = make_stream(
+            server, chunk=timedelta(hours=12), clock=Clock(NOW)
+        )
+        events = [e async for e in stream.entries("00000001", NOW - 36 * HOUR)]
+        self.assertEqual(events, server.events)
+        self.assertEqual(len(transport.requests), 3)
+        self.assertTrue(transport.requests[0][1].endswith("/asc"))
+        self.assertEqual(stream.cursors, {"00000001": NOW})
+
+    @async_test
+    async def test_overlapping_polls(self):
+        clock = Clock(NOW)
+        server = LogServer([NOW - 2 * HOUR, NOW - 60])
+        stream, transport = make_stream(server, clock=clock)
+        first = [e async for e in stream.entries("00000001")]
+        self.assertEqual(len(first), 2)
+        # A late event arrives inside the overlap, and a new one after it:
+        server.events.append({"_id": "late", "time": NOW - 30})
+        server.events.append({"_id": "new", "time": NOW + 60})
+        clock.now += 120
+        second = [e async for e in stream.entries("00000001")]
+        self.assertEqual([e["_id"] for e in second], ["late", "new"])
+        self.assertIn(f"/from/{NOW - HOUR}/to/{NOW + 120}/", transport.requests[1][1])
+
+    @async_test
+    async def test_history(self):
+        stream, transport = make_stream(
+            LogServer([NOW - 60]), log="history", filter="no_data", clock=Clock(NOW)
+        )
+        self.assertEqual(len([e async for e in stream.entries("00000001")]), 1)
+        self.assertIn("/history/no_data/from/", transport.requests[0][1])
+        with self.assertRaises(AssertionError):
+            make_stream(LogServer([]), log="nonsense")
+
+    @async_test
+    async def test_entries_without_ids(self):
+        def handler(method, url, data, headers):
+            return json_response([{"code": 1}, {"code": 2}, {"code": 1}])
+
+        stream, _ = make_stream(handler, clock=Clock(NOW))
+        events = [e async for e in stream.entries("00000001")]
+        self.assertEqual(events, [{"code": 1}, {"code": 2}])
+
+    @async_test
+    async def test_poll_and_checkpoint(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cursors.json")
+            server = LogServer([NOW - 60])
+            stream, _ = make_stream(
+                server, checkpoint=Checkpoint(path), clock=Clock(NOW)
+            )
+            stations = ["00000001", "00000002"]
+            results = dict(await stream.poll(stations))
+            self.assertEqual(
+                {s: len(e) for s, e in results.items()}, {s: 1 for s in stations}
+            )
+            self.assertEqual(
+                dict(await stream.poll(stations)), {s: [] for s in stations}
+            )
+
+            # A new stream picks up from the saved cursors:
+            stream, transport = make_stream(
+                server, checkpoint=Checkpoint(path), clock=Clock(NOW)
+            )
+            await stream.poll(["00000001"])
+            self.assertIn(f"/from/{NOW - HOUR}/", transport.requests[0][1])
+
+    @async_test
+    async def test_monitor(self):
+        clock = Clock(NOW)
+        server = LogServer([NOW - 60])
+        stream, transport = make_stream(server, clock=clock)
+        seen = []
+        async for station, event in stream.monitor(["00000001"], interval=0):
+            seen.append(event["_id"])
+            if len(seen) == 1:
+                server.events.append({"_id": "next", "time": NOW + 10})
+                clock.now += 20
+            else:
+                break
+        self.assertEqual(seen, [f"e{NOW - 60}", "next"])
+
+    @async_test
+    async def test_checkpoint_saved_per_poll(self):
+        class CountingCheckpoint(Checkpoint):
+            saves = 0
+
+            def save(self):
+                self.saves += 1
+                super().save()
+
+        with TemporaryDirectory() as directory:
+            checkpoint = CountingCheckpoint(os.path.join(directory, "cursors.json"))
+            clock = Clock(NOW)
+            stream, transport = make_stream(
+                LogServer([]),
+                chunk=timedelta(hours=1),
+                checkpoint=checkpoint,
+                save_interval=10 * HOUR,
+                clock=clock,
+            )
+            stations = [f"{i:08}" for i in range(5)]
+            await stream.poll(stations)
+            clock.now += 2 * HOUR
+            await stream.poll(stations)
+            # 5 stations read 1 chunk, then 3 chunks each, but the file is saved per poll:
+            self.assertEqual(len(transport.requests), 20)
+            self.assertEqual(checkpoint.saves, 2)
+            saved = Checkpoint(checkpoint.path)
+            self.assertEqual(saved.get("00000004", "events"), NOW + 2 * HOUR)
+
+    @async_test
+    async def test_monitor_survives_failing_station(self):
+        clock = Clock(NOW)
+        server = LogServer([NOW - 60])
+        failures = []
+
+        def handler(method, url, data, headers):
+            if "/00000002/" in url and not failures:
+                raise ConnectionError("Station 2 is down")
+            return server(method, url, data, headers)
+
+        def on_error(station, error):
+            failures.append(station)
+
+        stream, _ = make_stream(handler, clock=clock)
+        seen = []
+        stations = ["00000001", "00000002"]
+        async for station, event in stream.monitor(stations, 0, on_error=on_error):
+            seen.append(station)
+            if len(seen) == 2:
+                break
+            clock.now += 20
+        # The failing station was tried again at the next poll:
+        self.assertEqual(failures, ["00000002"])
+        self.assertEqual(seen, stations)
+
+    @async_test
+    async def test_error_responses_keep_cursor(self):
+        server = LogServer([NOW - 20 * HOUR, NOW - HOUR])
+        down = [True]
+
+        def handler(method, url, data, headers):
+            t_from = int(url.split("/")[-4])
+            if t_from >= NOW - 12 * HOUR and down[0]:
+                return json_response({"message": "Too many requests"}, 429)
+            if t_from >= NOW - 24 * HOUR:
+                return server(method, url, data, headers)
+            return Response(204, {}, b"")
+
+        chunk = timedelta(hours=12)
+        stream, _ = make_stream(handler, chunk=chunk, overlap=chunk, clock=Clock(NOW))
+        events = []
+        with self.assertRaises(ResponseError):
+            async for event in stream.entries("00000001", NOW - 36 * HOUR):
+                events.append(event)
+        # The empty period and the one before the error were read:
+        self.assertEqual(events, server.events[:1])
+        self.assertEqual(stream.cursors, {"00000001": NOW - 12 * HOUR})
+        down[0] = False
+        events = [e async for e in stream.entries("00000001")]
+        self.assertEqual(events, server.events[1:])
@@ -0,0 +1,173 @@
+import io
+import json
+import os
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import anyio
+
+from fieldclimate import FieldClimateClient
+from fieldclimate.sync import Checkpoint, Store, chunk_period, get_parser, plan, sync
+from fieldclimate.transport import Response
+from tests.utils import FakeTransport, async_test, json_response, trio_test
+
+DAY = 24 * 60 * 60
+
+
+class FakeClient:
+    """Pretends to serve a record at midnight on three days for every station."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def get_user_stations(self):
+        return [{"name": {"original": "00000001"}}, {"name": {"original": "00000002"}}]
+
+    async def get_data_range(self, station):
+        return {"min_date": "2019-01-01 00:00:00", "max_date": "2019-01-03 00:00:00"}
+
+    async def get_data(self, format, station, data_group, t_from, t_to):
+        self.requests.append((station, data_group, t_from, t_to))
+        dates = [t for t in range(t_from, t_to + 1) if t % DAY == 0]
+        return {"dates": dates, "data": []}
+
+    def raise_for_status(self):
+        return nullcontext()
+
+
+def data_server(respond):
+    """Serve a three day data range, answering data requests with respond(t_from)."""
+
+    def handler(method, url, data, headers):
+        if "/from/" not in url:
+            return json_response(
+                {"min_date": "2019-01-01 00:00:00", "max_date": "2019-01-03 00:00:00"}
+            )
+        return respond(int(url.split("/")[-3]))
+
+    return handler
+
+
+class SyncTestCase(TestCase):
+    def test_chunk_period(self):
+        self.assertEqual(list(chunk_period(0, 25, 10)), [(0, 9), (10, 19), (20, 25)])
+        self.assertEqual(list(chunk_period(25, 25, 10)), [(25, 25)])
+        self.assertEqual(list(chunk_period(26, 25, 10)), [])
+
+    def test_checkpoint_persists(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "checkpoint.json")
+            Checkpoint(path).update("00000001", "raw", 1546300800)
+            self.assertEqual(Checkpoint(path).get("00000001", "raw"), 1546300800)
+            self.assertIsNone(Checkpoint(path).get("00000001", "hourly"))
+
+    def test_parser(self):
+        args = get_parser().parse_args(
+            ["00000001", "-g", "hourly", "-g", "daily", "--since", "2019-01-02"]
+        )
+        self.assertEqual(args.stations, ["00000001"])
+        self.assertEqual(args.data_groups, ["hourly", "daily"])
+        self.assertEqual(args.since, datetime(2019, 1, 2, tzinfo=timezone.utc))
+
+    def _sync(self, client, directory, **kwargs):
+        return sync(
+            client,
+            store=Store(directory),
+            checkpoint=Checkpoint(os.path.join(directory, "checkpoint.json")),
+            chunk=timedelta(days=1),
+            progress_out=io.StringIO(),
+            **kwargs,
+        )
+
+    @async_test
+    async def test_sync_all_stations(self):
+        with TemporaryDirectory() as directory:
+            client = FakeClient()
+            stats = await self._sync(client, directory, data_groups=["raw", 1])
+            # 2 stations * 2 groups * 3 days, with no record fetched twice:
+            self.assertEqual(len(client.requests), 12)
+            self.assertEqual(stats["chunks"], 12)
+            self.assertEqual(stats["records"], 12)
+            with open(os.path.join(directory, "00000002", "hourly.jsonl")) as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual(
+                [(line["from"], line["to"]) for line in lines],
+                [
+                    (1546300800, 1546387199),
+                    (1546387200, 1546473599),
+                    (1546473600, 1546473600),
+                ],
+            )
+
+    @async_test
+    async def test_plan_reads_data_ranges_concurrently(self):
+        class SlowClient(FakeClient):
+            running = peak = 0
+
+            async def get_data_range(self, station):
+                self.running += 1
+                self.peak = max(self.peak, self.running)
+                await anyio.sleep(0.01)
+                self.running -= 1
+                return await super().get_data_range(station)
+
+        with TemporaryDirectory() as directory:
+            client = SlowClient()
+            checkpoint = Checkpoint(os.path.join(directory, "checkpoint.json"))
+            stations = [f"{i:08}" for i in range(6)]
+            periods = await plan(client, stations, ["raw"], checkpoint, limit=3)
+            self.assertEqual([period[0] for period in periods], stations)
+            self.assertEqual(client.peak, 3)
+
+    @trio_test
+    async def test_sync_resumes_from_checkpoint(self):
+        with TemporaryDirectory() as directory:
+            checkpoint = Checkpoint(os.path.join(directory, "checkpoint.json"))
+            checkpoint.update("00000001", "raw", 1546300800 + DAY)
+            client = FakeClient()
+            await self._sync(client, directory, stations=["00000001"], rate=1000)
+            # Resume just after the checkpoint, so its record isn't fetched again:
+            self.assertEqual(
+                client.requests, [("00000001", "raw", 1546387201, 1546473600)]
+            )
+            # A finished sync has nothing left to do:
+            client = FakeClient()
+            await self._sync(client, directory, stations=["00000001"])
+            self.assertEqual(client.requests, [])
+
+    @async_test
+    async def test_sync_stops_at_error_responses(self):
+        def respond(t_from):
+            if t_from >= 1546387200:
+                return json_response({"message": "Too many requests"}, 429)
+            return json_response({"dates": ["2019-01-01 00:00:00"], "data": []})
+
+        transport = FakeTransport(data_server(respond))
+        client = FieldClimateClient("super", "secret", transport=transport)
+        with TemporaryDirectory() as directory:
+            stats = await self._sync(client, directory, stations=["00000001"])
+            self.assertEqual((stats["chunks"], stats["failed"]), (1, 1))
+            with open(os.path.join(directory, "00000001", "raw.jsonl")) as f:
+                self.assertEqual(len(f.readlines()), 1)
+            # The error isn't stored, so a rerun fetches it again:
+            checkpoint = Checkpoint(os.path.join(directory, "checkpoint.json"))
+            self.assertEqual(checkpoint.get("00000001", "raw"), 1546387199)
+
+    @async_test
+    async def test_sync_empty_chunks(self):
+        def respond(t_from):
+            if t_from == 1546387200:
+                return Response(204, {}, b"")
+            return json_response({"dates": ["2019-01-01 00:00:00"], "data": []})
+
+        transport = FakeTransport(data_server(respond))
+        client = FieldClimateClient("super", "secret", transport=transport)
+        with TemporaryDirectory() as directory:
+            stats = await self._sync(client, directory, stations=["00000001"])
+            self.assertEqual(stats["chunks"], 3)
+            self.assertEqual(stats["records"], 2)
+            self.assertEqual(stats["failed"], 0)
+            checkpoint = Checkpoint(os.path.join(directory, "checkpoint.json"))
+            self.assertEqual(checkpoint.get("00000001", "raw"), 1546473600)
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+import numpy as np
+
+from fieldclimate.models import Station
+from fieldclimate.times import local_seconds, to_datetime64, to_epoch, utc_offsets
+
+DATES = ["2019-03-31 01:00:00", "2019-03-31 03:00:00", "2019-09-23 10:00:00"]
+
+
+def one_by_one(dates, tz):
+    return [
+        int(datetime.strptime(d, "%Y-%m-%d %H:%M:%S").replace(tzinfo=tz).timestamp())
+        for d in dates
+    ]
+
+
+class TimesTestCase(TestCase):
+    def test_utc(self):
+        self.assertEqual(to_epoch(DATES).tolist(), one_by_one(DATES, timezone.utc))
+        self.assertEqual(to_epoch([]).tolist(), [])
+
+    def test_fixed_offsets(self):
+        expected = one_by_one(DATES, timezone(timedelta(hours=1)))
+        # Stations report timezone_offset in minutes:
+        self.assertEqual(to_epoch(DATES, 60).tolist(), expected)
+        station = Station({"config": {"timezone_offset": 60}})
+        self.assertEqual(to_epoch(DATES, station).tolist(), expected)
+        self.assertEqual(
+            to_epoch(DATES, timezone(timedelta(hours=1))).tolist(), expected
+        )
+
+    def test_daylight_saving_time(self):
+        try:
+            from zoneinfo import ZoneInfo
+        except ImportError:
+            self.skipTest("zoneinfo requires Python 3.9")
+        expected = one_by_one(DATES, ZoneInfo("Europe/Vienna"))
+        self.assertEqual(to_epoch(DATES, "Europe/Vienna").tolist(), expected)
+        # Summer and winter time differ, so each date gets its own offset:
+        offsets = utc_offsets(local_seconds(DATES), "Europe/Vienna")
+        self.assertEqual(offsets.tolist(), [3600, 7200, 7200])
+        dates = np.array(DATES).reshape(3, 1)
+        self.assertEqual(to_epoch(dates, "Europe/Vienna").shape, (3, 1))
+
+    def test_datetime64(self):
+        result = to_datetime64(DATES, 120)
+        self.assertEqual(result.dtype, np.dtype("datetime64[s]"))
+        self.assertEqual(str(result[2]), "2019-09-23T08:00:00")
+        # datetime64 input works too:
+        dates = np.array(DATES, dtype="datetime64[s]")
+        self.assertEqual(to_epoch(dates, 120).tolist(), to_epoch(DATES, 120).tolist())
@@ -0,0 +1,103 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from unittest import TestCase
+
+from fieldclimate import FieldClimateClient
+from fieldclimate.transport import IdleSocketQ, Response
+from tests.utils import FakeTransport, async_test, json_response, trio_test
+
+
+class LocalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.client_ports.add(self.client_address[1])
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeSocket:
+    def __init__(self, host):
+        self.host = host
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+
+class TransportTestCase(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), LocalHandler)
+        self.server.client_ports = set()
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def local_client(self, **attrs):
+        host, port = self.server.server_address
+        attrs["base_location"] = f"http://{host}:{port}"
+        client_class = type("LocalClient", (FieldClimateClient,), attrs)
+        return client_class(public_key="super", private_key="secret")
+
+    def test_response_json(self):
+        self.assertEqual(Response(200, {}, b'{"a": [1]}').json(), {"a": [1]})
+
+    @async_test
+    async def test_request_json_uses_transport(self):
+        transport = FakeTransport(lambda *request: json_response({"username": "me"}))
+        client = FieldClimateClient(
+            public_key="super", private_key="secret", transport=transport
+        )
+        self.assertEqual(await client.get_user(), {"username": "me"})
+        method, url, data, headers = transport.requests[0]
+        self.assertEqual(method, "GET")
+        self.assertEqual(url, "https://api.fieldclimate.com/v1/user")
+        self.assertTrue(headers["Authorization"].startswith("hmac super:"))
+
+    @async_test
+    async def test_keep_alive_reuses_connection(self):
+        async with self.local_client() as client:
+            for _ in range(3):
+                self.assertEqual(await client.get_user(), {"path": "/user"})
+        self.assertEqual(len(self.server.client_ports), 1)
+
+    @trio_test
+    async def test_no_keep_alive(self):
+        async with self.local_client(keep_alive=False) as client:
+            for _ in range(3):
+                self.assertEqual(await client.get_user(), {"path": "/user"})
+        self.assertEqual(len(self.server.client_ports), 3)
+
+    @async_test
+    async def test_warm_up(self):
+        client = self.local_client()
+        async with client:
+            await client.warm_up(3)
+            self.assertEqual(len(client._conn_pool), 3)
+            # Warm connections are reused rather than opening more.
+            await client.warm_up(3)
+            self.assertEqual(len(client._conn_pool), 3)
+
+    @async_test
+    async def test_idle_eviction(self):
+        client = self.local_client(keepalive_expiry=60)
+        pool = client._conn_pool
+        self.assertIsInstance(pool, IdleSocketQ)
+        fresh, stale = FakeSocket("a"), FakeSocket("b")
+        pool.appendleft(stale)
+        pool.appendleft(fresh)
+        stale.idle_since -= 120
+        await client.transport.evict_idle()
+        self.assertEqual(list(pool), [fresh])
+        self.assertTrue(stale.closed)
+        self.assertFalse(fresh.closed)
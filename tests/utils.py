@@ -1,16 +1,15 @@
 import asyncio
-import sys
+import json
 from functools import partial
 
 import curio
 import trio
 
+from fieldclimate.transport import Response
+
 
 def async_test(coro):
     def wrapper(*args, **kwargs):
-
-        if sys.version_info < (3, 7):
-            return asyncio.get_event_loop().run_until_complete(coro(*args, **kwargs))
         return asyncio.run(coro(*args, **kwargs))
 
     return wrapper
@@ -30,3 +29,47 @@ def trio_test(coro):
         return trio.run(partial(coro, *args, **kwargs))
 
     return wrapper
+
+
+class Clock:
+    """A clock for tests, standing still at now until moved."""
+
+    def __init__(self, now=0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeTransport:
+    """Answer requests with handler(method, url, data, headers) -> Response,
+    remembering every request sent."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+
+    async def request(self, method, url, data=None, headers=None):
+        self.requests.append((method, url, data, headers))
+        return self.handler(method, url, data, headers)
+
+    async def warm_up(self, url, connections):
+        pass
+
+    async def close(self):
+        pass
+
+
+def json_response(obj, status_code=200, headers=None):
+    return Response(status_code, headers or {}, json.dumps(obj).encode())
+
+
+def count_requests():
+    # A fake server answering each request with how many it has seen.
+    seen = []
+
+    def handler(method, url, data, headers):
+        seen.append(url)
+        return json_response({"count": len(seen)}, headers={"ETag": f'"{len(seen)}"'})
+
+    return handler